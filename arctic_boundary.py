@@ -0,0 +1,177 @@
+import numpy as np
+
+
+# Largest number of blocks along each axis of the maps of faces, over which the frozen faces are counted (the cost of the
+# extraction beyond the counting does not depend on the room size)
+BOUNDARY_MAX_BLOCKS = 256
+
+# Width of the box filter that smooths the fraction of frozen faces (in blocks)
+BOUNDARY_WINDOW = 3
+
+# A block is frozen if the smoothed fraction of its faces that lie on a pole is at least this threshold
+FROZEN_THRESHOLD = 0.5
+
+# Minimum number of boundary points to fit an ellipse (five degrees of freedom)
+MIN_BOUNDARY_POINTS = 6
+
+
+# ----------------------------------------------------------------
+# Extract the boundary between the frozen poles and the liquid center of the hex, and fit an ellipse through it: the
+# centre, the radii (major, minor), and the angle of the major axis are expressed in normalized hex coordinates, in which
+# the arctic circle of a uniformly random room is the circle of radius sqrt(3)/2 centred at the origin
+# ----------------------------------------------------------------
+def extract_arctic_boundary(room, N):
+  points = get_boundary_points(room, N)
+  boundary = fit_ellipse(points)
+  boundary['nb_points'] = len(points)
+  return boundary
+
+
+# ----------------------------------------------------------------
+# Get the points of the boundary in normalized hex coordinates [u, v], from the faces of the three orientations
+# ----------------------------------------------------------------
+def get_boundary_points(room, N):
+
+  # Each visible face of the hex belongs to one of three maps of N x N faces: the top faces of the stacks (indexed by
+  # [y, x]), and the faces normal to x and to y (indexed by [y, z] and [x, z]). A face is frozen if it lies on one of the
+  # six poles of the hex, namely, on the floor, the ceiling, or the walls of the room (see "Fitness")
+  block_ini, block_len = get_blocks(N)
+  block_mid = block_ini + block_len / 2
+  fractions = get_pole_fractions(room, N, block_ini, block_len)
+
+  # Position of the faces of each pole, as a function of the block coordinates of their map
+  zeros = np.zeros_like(block_mid)
+  ones = np.full_like(block_mid, N)
+  poles = [
+    (fractions[0], lambda i, j: (block_mid[j], block_mid[i], zeros[i])), # z_empty [y, x]
+    (fractions[1], lambda i, j: (block_mid[j], block_mid[i], ones[i])),  # z_full [y, x]
+    (fractions[2], lambda i, j: (zeros[i], block_mid[i], block_mid[j])), # x_empty [y, z]
+    (fractions[3], lambda i, j: (ones[i], block_mid[i], block_mid[j])),  # x_full [y, z]
+    (fractions[4], lambda i, j: (block_mid[i], zeros[i], block_mid[j])), # y_empty [x, z]
+    (fractions[5], lambda i, j: (block_mid[i], ones[i], block_mid[j]))]  # y_full [x, z]
+
+  points = []
+  for pole_fractions, get_position in poles:
+    is_frozen = box_filter(pole_fractions, BOUNDARY_WINDOW) >= FROZEN_THRESHOLD
+    i, j = np.nonzero(get_boundary_cells(is_frozen))
+    x, y, z = get_position(i, j)
+    points.append(np.stack([(y - x) * np.sqrt(3) / (2*N), (2*z - x - y) / (2*N)], axis=1))
+  return np.concatenate(points)
+
+
+# ----------------------------------------------------------------
+# Split the N faces along each axis of the maps into blocks, and get the first index and the length of each block
+# ----------------------------------------------------------------
+def get_blocks(N):
+  block_size = -(-N // BOUNDARY_MAX_BLOCKS)
+  block_ini = np.arange(0, N, block_size)
+  block_len = np.minimum(block_ini + block_size, N) - block_ini
+  return block_ini, block_len
+
+
+# ----------------------------------------------------------------
+# Get the fraction of the faces of each block that lie on each of the six poles: z_empty, z_full, x_empty, x_full,
+# y_empty, y_full
+# ----------------------------------------------------------------
+def get_pole_fractions(room, N, block_ini, block_len):
+
+  # Top faces: the floor is visible where the stack is empty, and the ceiling where the stack is full (one block of rows at
+  # a time, so that no temporary array is as large as the room itself)
+  nb_blocks = len(block_ini)
+  z_empty = np.empty((nb_blocks, nb_blocks))
+  z_full = np.empty((nb_blocks, nb_blocks))
+  for k in range(nb_blocks):
+    rows = room[block_ini[k]:block_ini[k] + block_len[k]]
+    z_empty[k] = np.add.reduceat(np.count_nonzero(rows == 0, axis=0), block_ini)
+    z_full[k] = np.add.reduceat(np.count_nonzero(rows == N, axis=0), block_ini)
+
+  # Faces normal to x (resp. y): the row [y, :] (resp. the column [:, x]) shows the face [y, z] (resp. [x, z]) on the
+  # far wall if its last stack is higher than z, and on the near wall if its first stack is not higher than z, so that
+  # these faces only depend on the stacks along the walls
+  x_empty = count_faces_below(room[:, 0], block_ini, block_len, is_below=False)
+  x_full = count_faces_below(room[:, N-1], block_ini, block_len, is_below=True)
+  y_empty = count_faces_below(room[0, :], block_ini, block_len, is_below=False)
+  y_full = count_faces_below(room[N-1, :], block_ini, block_len, is_below=True)
+
+  areas = block_len[:, None] * block_len[None, :]
+  return [counts / areas for counts in [z_empty, z_full, x_empty, x_full, y_empty, y_full]]
+
+
+# ----------------------------------------------------------------
+# Count the faces [i, z] of each block such that z is below the height of the stack i (or not below, if "is_below" is
+# false), for a line of stacks along a wall
+# ----------------------------------------------------------------
+def count_faces_below(heights, block_ini, block_len, is_below):
+  counts = np.clip(heights.astype(np.int64)[:, None] - block_ini[None, :], 0, block_len[None, :])
+  if not is_below:
+    counts = block_len[None, :] - counts
+  return np.add.reduceat(counts, block_ini, axis=0)
+
+
+# ----------------------------------------------------------------
+# Average the values over a square window centred on each cell (the window is cropped along the borders of the map)
+# ----------------------------------------------------------------
+def box_filter(values, size):
+  half = size // 2
+  sums = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+  i = np.arange(values.shape[0])
+  j = np.arange(values.shape[1])
+  i_ini, i_end = np.maximum(i - half, 0)[:, None], np.minimum(i + half + 1, values.shape[0])[:, None]
+  j_ini, j_end = np.maximum(j - half, 0)[None, :], np.minimum(j + half + 1, values.shape[1])[None, :]
+  window_sums = sums[i_end, j_end] - sums[i_ini, j_end] - sums[i_end, j_ini] + sums[i_ini, j_ini]
+  return window_sums / ((i_end - i_ini) * (j_end - j_ini))
+
+
+# ----------------------------------------------------------------
+# Get the frozen cells that have at least one liquid 4-neighbor (the borders of the map, along which the faces are
+# adjacent to the faces of another map, are not part of the boundary)
+# ----------------------------------------------------------------
+def get_boundary_cells(is_frozen):
+  is_liquid = ~is_frozen
+  has_liquid_neighbor = np.zeros_like(is_frozen)
+  has_liquid_neighbor[1:] |= is_liquid[:-1]
+  has_liquid_neighbor[:-1] |= is_liquid[1:]
+  has_liquid_neighbor[:, 1:] |= is_liquid[:, :-1]
+  has_liquid_neighbor[:, :-1] |= is_liquid[:, 1:]
+  return is_frozen & has_liquid_neighbor
+
+
+# ----------------------------------------------------------------
+# Fit an ellipse through the points [u, v] (least-squares conic), and measure the residual as the root mean square radial
+# distance between the points and the ellipse (all the fields are None if no ellipse can be fitted)
+# ----------------------------------------------------------------
+def fit_ellipse(points):
+
+  boundary = {'centre': None, 'radii': None, 'angle': None, 'residual': None}
+  if len(points) < MIN_BOUNDARY_POINTS:
+    return boundary
+
+  # Conic a*u^2 + b*u*v + c*v^2 + d*u + e*v + f = 0, as the right singular vector of the smallest singular value
+  u, v = points[:, 0], points[:, 1]
+  design = np.stack([u**2, u*v, v**2, u, v, np.ones_like(u)], axis=1)
+  a, b, c, d, e, f = np.linalg.svd(design, full_matrices=False)[2][-1]
+  if b**2 - 4*a*c >= 0:
+    return boundary
+
+  # Centre, where the gradient of the conic vanishes, and radii along the eigenvectors of the quadratic form
+  u_centre, v_centre = np.linalg.solve([[2*a, b], [b, 2*c]], [-d, -e])
+  f_centre = f + (d*u_centre + e*v_centre) / 2
+  eigenvalues, eigenvectors = np.linalg.eigh([[a, b/2], [b/2, c]])
+  squared_radii = -f_centre / eigenvalues
+  if np.any(squared_radii <= 0):
+    return boundary
+  order = np.argsort(squared_radii)[::-1]
+  radius_major, radius_minor = np.sqrt(squared_radii[order])
+  angle = np.arctan2(eigenvectors[1, order[0]], eigenvectors[0, order[0]])
+
+  # Radial distance between each point and the ellipse, along the ray from the centre
+  du, dv = u - u_centre, v - v_centre
+  alpha = np.arctan2(dv, du) - angle
+  radius = radius_major * radius_minor / np.hypot(radius_minor * np.cos(alpha), radius_major * np.sin(alpha))
+  residual = np.sqrt(np.mean((np.hypot(du, dv) - radius)**2))
+
+  boundary['centre'] = (float(u_centre), float(v_centre))
+  boundary['radii'] = (float(radius_major), float(radius_minor))
+  boundary['angle'] = float(np.degrees(angle) % 180)
+  boundary['residual'] = float(residual)
+  return boundary
@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import contextlib
+import numpy as np
+import matplotlib
+import parameters
+import fitness
+from generate_room import run_room_chain
+from generate_room import room_initialization
+from display_room import display_room
+from room_store import save_room
+from generate_and_display_hex import generate_and_display_hex
+from rasterize_hex import rasterize_hex
+from export_hex_svg import export_hex_svg
+
+
+# Default parameters of the benchmarked runs (the seed is planted, so that all versions run the same chains)
+DEFAULT_PARAMETERS = dict(
+  N                    = 16,
+  GENERATE_ROOM        = True,
+  GENERATE_HEX         = False,
+  INI_PATTERN          = 'empty',
+  NB_ITER_FLIP         = 10**4,
+  ENGINE               = 'flip',
+  NB_SAMPLES           = 1,
+  NB_WORKERS           = 1,
+  SHOW_DETAILED_ROOM   = True,
+  DARK_BACKGROUND      = False,
+  COLOR_THEME          = 'rgb',
+  DRAW_FLOOR_AND_WALLS = True,
+  HEX_RENDERER         = 'matplotlib',
+  RASTER_SCALE         = 8,
+  USE_RANDOM_SEED      = True,
+  VAL_RANDOM_SEED      = 3.14,
+  SHOW_INTERIM         = False,
+  SHOW_FINAL_ROOM      = False,
+  NB_RENDER_WORKERS    = 0,
+  INSTRUMENT           = False,
+  INTERIM_LOG_ITERX    = 10**4,
+  INTERIM_PRINT_ITERX  = 10**4,
+  CHECKPOINT_ITERX     = 0,
+  RESUME               = False,
+  RECORD_TRAJECTORY    = False,
+  KEYFRAME_ITERX       = 10**4,
+  CONVERGENCE_ESS      = 0,
+  CONVERGENCE_ITERX    = 10**2,
+  STATS_ITERX          = 0,
+  TRACK_BOUNDARY       = False,
+  RESULTS_PATH         = 'results')
+
+
+# ----------------------------------------------------------------
+# Run all the benchmarks, and save the results as JSON
+# ----------------------------------------------------------------
+def run_benchmarks(path, list_N, list_ini_pattern, list_engine, nb_flips, list_N_display, list_N_hex, nb_repeats):
+
+  results = []
+  for N in list_N:
+    for INI_PATTERN in list_ini_pattern:
+      for ENGINE in list_engine:
+        results.append(benchmark_room(N, INI_PATTERN, ENGINE, nb_flips, nb_repeats))
+        print_benchmark(results[-1])
+    results.append(benchmark_fitness(N, nb_repeats))
+    print_benchmark(results[-1])
+
+  for N in list_N_display:
+    for SHOW_DETAILED_ROOM in [False, True]:
+      results.append(benchmark_display(N, SHOW_DETAILED_ROOM, nb_repeats))
+      print_benchmark(results[-1])
+
+  for N in list_N_hex:
+    for DRAW_FLOOR_AND_WALLS in [False, True]:
+      for HEX_RENDERER in ['matplotlib', 'raster', 'svg']:
+        results.append(benchmark_hex(N, DRAW_FLOOR_AND_WALLS, HEX_RENDERER, nb_repeats))
+        print_benchmark(results[-1])
+
+  report = {
+    'environment': get_environment(),
+    'results': results}
+  with open(path, 'w') as fid:
+    json.dump(report, fid, indent=2)
+
+
+# ----------------------------------------------------------------
+# Measure the number of flips per second of the room generation, from the initialization to the last flip (the final
+# display is measured separately)
+# ----------------------------------------------------------------
+def benchmark_room(N, INI_PATTERN, ENGINE, nb_flips, nb_repeats):
+  # (the parameters are set again for each repeat, so that the random seed is planted again)
+  # (the parallel engine runs one worker process per core)
+  kwargs = dict(N=N, INI_PATTERN=INI_PATTERN, ENGINE=ENGINE, NB_ITER_FLIP=nb_flips)
+  if ENGINE == 'parallel_sweep':
+    kwargs['NB_WORKERS'] = os.cpu_count()
+  p = get_parameters(**kwargs)
+  seconds = measure(lambda: run_room_chain(get_parameters(**kwargs), time.time()), nb_repeats)
+  return {
+    'benchmark': 'room',
+    'N': N,
+    'INI_PATTERN': INI_PATTERN,
+    'ENGINE': ENGINE,
+    'NB_WORKERS': p.NB_WORKERS,
+    'nb_flips': p.NB_ITER_TOTAL,
+    'seconds': seconds,
+    'flips_per_second': p.NB_ITER_TOTAL / seconds}
+
+
+# ----------------------------------------------------------------
+# Measure the time to assess the fitness of a whole room
+# ----------------------------------------------------------------
+def benchmark_fitness(N, nb_repeats):
+  room, _, _ = room_initialization('arctic_circle', N)
+  f = fitness.Fitness()
+  seconds = measure(lambda: f.assess_room_fitness(room, N), max(nb_repeats, 10))
+  return {
+    'benchmark': 'fitness',
+    'N': N,
+    'seconds': seconds}
+
+
+# ----------------------------------------------------------------
+# Measure the time to display one interim frame, once the figure has been created
+# ----------------------------------------------------------------
+def benchmark_display(N, SHOW_DETAILED_ROOM, nb_repeats):
+  p = get_parameters(N=N, INI_PATTERN='arctic_circle', SHOW_DETAILED_ROOM=SHOW_DETAILED_ROOM)
+  room, lookup_add, lookup_rmv = room_initialization('arctic_circle', N)
+  f = fitness.Fitness()
+  f.assess_room_fitness(room, N)
+  t_ini = time.time()
+  display = lambda: display_room(room, lookup_add, lookup_rmv, t_ini, t_ini, p, f, 0, 0, 0, 1)
+  seconds_first = measure(display, 1)
+  seconds = measure(display, nb_repeats)
+  return {
+    'benchmark': 'display',
+    'N': N,
+    'SHOW_DETAILED_ROOM': SHOW_DETAILED_ROOM,
+    'seconds_first_frame': seconds_first,
+    'seconds': seconds}
+
+
+# ----------------------------------------------------------------
+# Measure the time to generate the hex, with each renderer
+# ----------------------------------------------------------------
+def benchmark_hex(N, DRAW_FLOOR_AND_WALLS, HEX_RENDERER, nb_repeats):
+
+  # The hex is generated from a random room (which is not part of the measured time)
+  p = get_parameters(
+    N=N, INI_PATTERN='arctic_circle', ENGINE='sweep', NB_ITER_FLIP=N**3, DRAW_FLOOR_AND_WALLS=DRAW_FLOOR_AND_WALLS,
+    HEX_RENDERER=HEX_RENDERER)
+  with silence():
+    room, _, _, _ = run_room_chain(p, time.time())
+  save_room(os.path.join(p.RESULTS_PATH, p.ROOM_NAME), room, p.N, p.INI_PATTERN, p.NB_ITER_FLIP, p.SEED)
+
+  renderers = {'matplotlib': generate_and_display_hex, 'raster': rasterize_hex, 'svg': export_hex_svg}
+  seconds = measure(lambda: renderers[HEX_RENDERER](p), nb_repeats)
+  return {
+    'benchmark': 'hex',
+    'N': N,
+    'DRAW_FLOOR_AND_WALLS': DRAW_FLOOR_AND_WALLS,
+    'HEX_RENDERER': HEX_RENDERER,
+    'seconds': seconds}
+
+
+# ----------------------------------------------------------------
+# Get the parameters of a benchmarked run (without printing them)
+# ----------------------------------------------------------------
+def get_parameters(**kwargs):
+  with silence():
+    return parameters.Parameters(**dict(DEFAULT_PARAMETERS, **kwargs))
+
+
+# ----------------------------------------------------------------
+# Get the best time out of several repeats, in seconds (the console output is discarded while being measured)
+# ----------------------------------------------------------------
+def measure(run, nb_repeats):
+  seconds = []
+  for _ in range(nb_repeats):
+    with silence():
+      t_ini = time.perf_counter()
+      run()
+      seconds.append(time.perf_counter() - t_ini)
+  return min(seconds)
+
+
+# ----------------------------------------------------------------
+# Discard the console output
+# ----------------------------------------------------------------
+@contextlib.contextmanager
+def silence():
+  with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    yield
+
+
+# ----------------------------------------------------------------
+# Describe the environment, so that results are only compared between comparable machines
+# ----------------------------------------------------------------
+def get_environment():
+  try:
+    commit = subprocess.run(
+      ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+      ).stdout.strip()
+  except OSError:
+    commit = None
+  return {
+    'commit': commit,
+    'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+    'python': platform.python_version(),
+    'numpy': np.__version__,
+    'matplotlib': matplotlib.__version__,
+    'machine': platform.machine(),
+    'processor': platform.processor(),
+    'nb_cpus': os.cpu_count()}
+
+
+# ----------------------------------------------------------------
+# Print one benchmark result in the console
+# ----------------------------------------------------------------
+def print_benchmark(result):
+  print(' | '.join('{}: {}'.format(key, round(value, 6) if isinstance(value, float) else value) for key, value in result.items()))
+
+
+# ----------------------------------------------------------------
+# Compare two benchmark reports: print the ratio of the times of the same benchmarks (above one means slower)
+# ----------------------------------------------------------------
+def compare_benchmarks(path_reference, path_candidate):
+
+  with open(path_reference) as fid:
+    results_reference = json.load(fid)['results']
+  with open(path_candidate) as fid:
+    results_candidate = json.load(fid)['results']
+
+  # Benchmarks are identified by all their fields but the measured ones
+  measured = ['seconds', 'seconds_first_frame', 'flips_per_second']
+  get_key = lambda result: tuple((key, value) for key, value in result.items() if key not in measured)
+  seconds_reference = {get_key(result): result['seconds'] for result in results_reference}
+
+  for result in results_candidate:
+    key = get_key(result)
+    if key in seconds_reference:
+      print('{} | ratio: {:.3f}'.format(
+        ', '.join('{}: {}'.format(*item) for item in key), result['seconds'] / seconds_reference[key]))
+
+
+# ----------------------------------------------------------------
+# Run the default benchmarks, whose runs and report are saved in the results folder
+# ----------------------------------------------------------------
+def run_default_benchmarks(results_path='results'):
+  DEFAULT_PARAMETERS['RESULTS_PATH'] = results_path
+  run_benchmarks(
+    path             = os.path.join(results_path, 'benchmark.json'),                          # Path of the JSON report
+    list_N           = [8, 16, 32, 64],                                                       # Room sizes, to measure the room generation and the fitness
+    list_ini_pattern = ['empty', 'full', 'random_half', 'random_half_fast', 'arctic_circle'], # Room initializations
+    list_engine      = ['flip', 'sweep', 'parallel_sweep', 'heat_bath'],                      # Room engines
+    nb_flips         = 10**4,                                                                 # Number of random flips of each room generation
+    list_N_display   = [8, 16],                                                               # Room sizes, to measure the display of interim frames
+    list_N_hex       = [8, 16, 32, 64],                                                       # Room sizes, to measure the hex generation
+    nb_repeats       = 3)                                                                     # Number of repeats (the best time is kept)
+
+
+if __name__ == '__main__':
+
+  # Compare two previously saved reports
+  if len(sys.argv) == 3:
+    compare_benchmarks(sys.argv[1], sys.argv[2])
+    sys.exit()
+
+  # Run the benchmarks
+  run_default_benchmarks()
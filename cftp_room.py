@@ -0,0 +1,54 @@
+import time
+import numpy as np
+import generate_room
+from sweep_room import sweep_rooms
+from room_state import RoomState
+from random_stream import get_random_stream
+from instrumentation import get_probe
+from utils import print_iter_msg
+
+
+# ----------------------------------------------------------------
+# Coupling from the past: sample an exactly uniform room, by sweeping the two extreme rooms until they coalesce
+# ----------------------------------------------------------------
+def iterate_cftp(p, t_ini):
+
+  # Each seed drives one block of sweeps in the past: block 0 covers the sweep [-1, 0), block k the sweeps [-2^k, -2^(k-1))
+  stream = get_random_stream()
+  seeds = []
+  nb_coalesced = 0
+  probe = get_probe()
+  probe.start()
+
+  while True:
+
+    # Double the look-back, while reusing the randomness of the blocks that are closer to the present
+    seeds.extend(stream.spawn_seeds(1))
+    nb_sweeps = 2 ** (len(seeds) - 1)
+
+    # Log the progress, as the number of stacks that already coincide in both rooms
+    t_now = time.time()
+    print_iter_msg('CFTP (look-back: {} sweeps)'.format(nb_sweeps), nb_coalesced, p.N**2, t_now, t_ini)
+    probe.lap('log')
+
+    # The minimal and the maximal rooms bound every other room, and the sweeps preserve this order
+    room_bottom, _, _ = generate_room.room_initialization('empty', p.N)
+    room_top, _, _ = generate_room.room_initialization('full', p.N)
+
+    # Apply the blocks from the farthest to the closest to the present, with the same random maps for both rooms
+    for block_idx in reversed(range(len(seeds))):
+      rng = np.random.default_rng(seeds[block_idx])
+      for _ in range(max(1, 2 ** (block_idx - 1))):
+        sweep_rooms([room_bottom, room_top], p.N, rng)
+    probe.lap('sweep')
+
+    # Once both rooms have coalesced, every possible starting room would have led to the same room
+    nb_coalesced = np.sum(room_bottom == room_top)
+    if nb_coalesced == p.N**2:
+      break
+
+  t_now = time.time()
+  print_iter_msg('CFTP (look-back: {} sweeps)'.format(nb_sweeps), nb_coalesced, p.N**2, t_now, t_ini)
+
+  state = RoomState(room_bottom, p.N)
+  return room_bottom, state.lookup_add, state.lookup_rmv
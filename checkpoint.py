@@ -0,0 +1,47 @@
+import os
+import sys
+import pickle
+from random_stream import get_random_stream
+from random_stream import set_random_stream
+
+
+# ----------------------------------------------------------------
+# Save the complete state of the chain, along with the state of the random stream
+# ----------------------------------------------------------------
+def save_checkpoint(p, chain_state):
+
+  # Identify the run, to prevent a checkpoint from being resumed with incompatible parameters
+  checkpoint = dict(chain_state)
+  checkpoint['N'] = p.N
+  checkpoint['INI_PATTERN'] = p.INI_PATTERN
+  checkpoint['ENGINE'] = p.ENGINE
+  checkpoint['random_stream'] = get_random_stream()
+
+  # Write a temporary file first, so that an interruption while writing never corrupts the latest checkpoint
+  path = os.path.join(p.RESULTS_PATH, p.CHECKPOINT_NAME)
+  with open(path + '.tmp', 'wb') as fid:
+    pickle.dump(checkpoint, fid)
+  os.replace(path + '.tmp', path)
+
+
+# ----------------------------------------------------------------
+# Load the latest checkpoint, and restore the state of the random stream (None if there is no checkpoint)
+# ----------------------------------------------------------------
+def load_checkpoint(p):
+
+  path = os.path.join(p.RESULTS_PATH, p.CHECKPOINT_NAME)
+  if not os.path.isfile(path):
+    print('No checkpoint found in "{}", the room is generated from scratch'.format(path))
+    return None
+
+  with open(path, 'rb') as fid:
+    checkpoint = pickle.load(fid)
+
+  for name in ['N', 'INI_PATTERN', 'ENGINE']:
+    if checkpoint[name] != getattr(p, name):
+      print('ERROR: Parameter "{}" does not match the checkpoint: {} instead of {}'.format(
+        name, getattr(p, name), checkpoint[name]))
+      sys.exit()
+
+  set_random_stream(checkpoint['random_stream'])
+  return checkpoint
@@ -0,0 +1,146 @@
+import sys
+import json
+import numpy as np
+
+
+# Observables of the chain that are monitored: the room filling and the area of the six poles (see "Fitness")
+OBSERVABLES = ['filling', 'x_full', 'x_empty', 'y_full', 'y_empty', 'z_full', 'z_empty']
+
+# Minimum number of samples before the convergence is first assessed
+MIN_SAMPLES = 100
+
+# The convergence is assessed again once the number of samples has grown by this factor (which bounds the overall cost
+# of the estimations to a fraction of the sampling)
+ASSESSMENT_GROWTH = 1.05
+
+# Window of the autocorrelation sum: the smallest lag M such that M >= WINDOW_FACTOR * tau(M) (automatic windowing)
+WINDOW_FACTOR = 5
+
+
+class ConvergenceMonitor:
+
+  # ----------------------------------------------------------------
+  # Record the observables periodically while the chain runs, and assess whether their effective sample size has reached
+  # the target (the first half of the samples is discarded as burn-in)
+  # ----------------------------------------------------------------
+  def __init__(
+    self,
+    target_ess,
+    ):
+
+    self.target_ess = target_ess
+    self.samples = []
+    self.nb_samples_assessed = 0
+    self.iterx_stop = None
+
+  # ----------------------------------------------------------------
+  # Record the current observables (the chain is running, hence not stopped)
+  # ----------------------------------------------------------------
+  def sample(self, f):
+    self.samples.append([getattr(f, name) for name in OBSERVABLES])
+    self.iterx_stop = None
+
+  # ----------------------------------------------------------------
+  # Assess whether the chain has converged (if so, remember the iteration at which it is stopped)
+  # ----------------------------------------------------------------
+  def is_converged(self, iterx):
+    nb_samples = len(self.samples)
+    if nb_samples < 2 * MIN_SAMPLES or nb_samples < ASSESSMENT_GROWTH * self.nb_samples_assessed:
+      return False
+    self.nb_samples_assessed = nb_samples
+    _, _, ess = self.get_estimates()
+    if min(ess) >= self.target_ess:
+      self.iterx_stop = iterx
+      return True
+    return False
+
+  # ----------------------------------------------------------------
+  # Estimate the mean, the integrated autocorrelation time (in samples), and the effective sample size of each observable
+  # ----------------------------------------------------------------
+  def get_estimates(self):
+    samples = np.array(self.samples[len(self.samples) // 2:], dtype=np.float64).reshape(-1, len(OBSERVABLES))
+    mean = samples.mean(axis=0) if len(samples) > 0 else np.full(len(OBSERVABLES), np.nan)
+    tau = np.array([get_autocorrelation_time(series) for series in samples.T])
+    return mean, tau, len(samples) / tau
+
+  # ----------------------------------------------------------------
+  # Print the estimates of each observable
+  # ----------------------------------------------------------------
+  def print_summary(self):
+    mean, tau, ess = self.get_estimates()
+    if not sys.stdout.isatty():
+      print(json.dumps({
+        'msg': 'Convergence',
+        'iterx_stop': self.iterx_stop,
+        'observables': {name: {'mean': float(mean[k]), 'tau': float(tau[k]), 'ess': float(ess[k])}
+          for k, name in enumerate(OBSERVABLES)}}), flush=True)
+      return
+    print('{:<12} {:>16} {:>12} {:>12}'.format('Observable', 'Mean', 'Tau', 'ESS'))
+    for k, name in enumerate(OBSERVABLES):
+      print('{:<12} {:>16.6f} {:>12.2f} {:>12.1f}'.format(name, mean[k], tau[k], ess[k]))
+
+
+class NullMonitor:
+
+  # ----------------------------------------------------------------
+  # Same interface as the monitor, but nothing is recorded, and the chain always runs all its iterations
+  # ----------------------------------------------------------------
+  def __init__(self):
+    self.iterx_stop = None
+
+  def sample(self, f):
+    pass
+
+  def is_converged(self, iterx):
+    return False
+
+  def print_summary(self):
+    pass
+
+
+# ----------------------------------------------------------------
+# Estimate the integrated autocorrelation time of a series, tau = 1 + 2 * sum(rho(t)), with the automatic windowing of
+# Sokal (a constant series is deemed uncorrelated)
+# ----------------------------------------------------------------
+def get_autocorrelation_time(series):
+  nb_samples = len(series)
+  series = series - np.mean(series)
+  if nb_samples < 2 or not np.any(series):
+    return 1.0
+
+  # Autocorrelation function, via the FFT of the zero-padded series
+  spectrum = np.fft.rfft(series, 2 * nb_samples)
+  autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum))[:nb_samples]
+  autocorrelation /= autocorrelation[0]
+
+  taus = 2 * np.cumsum(autocorrelation) - 1
+  windows = np.arange(nb_samples)
+  is_window = windows >= WINDOW_FACTOR * taus
+  window = np.argmax(is_window) if np.any(is_window) else nb_samples - 1
+  return max(float(taus[window]), 1.0)
+
+
+# The convergence monitor of the current chain (disabled unless a target effective sample size is specified)
+monitor = NullMonitor()
+
+
+# ----------------------------------------------------------------
+# Start a new convergence monitor, as specified by the parameters
+# ----------------------------------------------------------------
+def start_convergence_monitor(p):
+  set_convergence_monitor(ConvergenceMonitor(p.CONVERGENCE_ESS) if p.CONVERGENCE_ESS > 0 else NullMonitor())
+
+
+# ----------------------------------------------------------------
+# Replace the convergence monitor (e.g., by a monitor restored from a checkpoint)
+# ----------------------------------------------------------------
+def set_convergence_monitor(convergence_monitor):
+  global monitor
+  monitor = convergence_monitor
+
+
+# ----------------------------------------------------------------
+# Get the convergence monitor of the current chain
+# ----------------------------------------------------------------
+def get_convergence_monitor():
+  return monitor
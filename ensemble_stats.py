@@ -0,0 +1,148 @@
+import os
+import sys
+import numpy as np
+from room_state import get_row_bands
+from room_state import compute_lookups_rows
+from room_store import SEED_SIZE
+from room_store import encode_seed
+from room_store import decode_seed
+
+
+# Fixed-size header, followed by three maps of N x N stacks: the mean height, the sum of the squared deviations from the
+# mean height (Welford), and the probability that the stack is frozen (no cube can be either added or removed)
+MAGIC = b'ARCTICST'
+VERSION = 2
+HEADER_SIZE = 128
+HEADER_DTYPE = np.dtype([
+  ('magic', 'S8'),
+  ('version', '<u4'),
+  ('N', '<u4'),
+  ('nb_samples', '<u8'),
+  ('nb_flips', '<i8'),
+  ('seed', 'S{}'.format(SEED_SIZE)),
+  ('pattern', 'S32'),
+  ('padding', 'V{}'.format(HEADER_SIZE - 64 - SEED_SIZE))])
+MAPS_DTYPE = np.dtype('<f8')
+
+
+class EnsembleStats:
+
+  # ----------------------------------------------------------------
+  # Create the statistics file, whose maps are updated in place as the rooms are folded in, one at a time (the memory does
+  # not depend on the number of samples)
+  # ----------------------------------------------------------------
+  def __init__(
+    self,
+    path,
+    N,
+    INI_PATTERN,
+    nb_flips,
+    seed=None,
+    ):
+
+    self.N = N
+
+    # Write the header
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['N'] = N
+    header['nb_flips'] = nb_flips
+    header['seed'] = encode_seed(seed)
+    header['pattern'] = INI_PATTERN.encode()
+    with open(path, 'wb') as fid:
+      header.tofile(fid)
+
+    # Map the header (to keep the number of samples up to date) and the maps, which start from zero
+    self.header = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+    self.mean, self.m2, self.frozen = map_ensemble_stats(path, 'r+', N)
+    self.nb_samples = 0
+
+  # ----------------------------------------------------------------
+  # Fold one room into the statistics (one band of rows at a time)
+  # ----------------------------------------------------------------
+  def add(self, room):
+    self.nb_samples += 1
+    for y_ini, y_end in get_row_bands(self.N):
+      heights = room[y_ini:y_end].astype(np.float64)
+      delta = heights - self.mean[y_ini:y_end]
+      self.mean[y_ini:y_end] += delta / self.nb_samples
+      self.m2[y_ini:y_end] += delta * (heights - self.mean[y_ini:y_end])
+      lookup_add, lookup_rmv = compute_lookups_rows(room, self.N, y_ini, y_end)
+      self.frozen[y_ini:y_end] += (~(lookup_add | lookup_rmv) - self.frozen[y_ini:y_end]) / self.nb_samples
+    self.header['nb_samples'] = self.nb_samples
+
+  # ----------------------------------------------------------------
+  # Write the statistics to the disk
+  # ----------------------------------------------------------------
+  def close(self):
+    self.header.flush()
+    self.mean.flush()
+    self.m2.flush()
+    self.frozen.flush()
+
+
+class NullStats:
+
+  # ----------------------------------------------------------------
+  # Same interface as the statistics, but no room is folded in
+  # ----------------------------------------------------------------
+  def add(self, room):
+    pass
+
+  def close(self):
+    pass
+
+
+# ----------------------------------------------------------------
+# Map the three maps of a statistics file
+# ----------------------------------------------------------------
+def map_ensemble_stats(path, mode, N):
+  return [
+    np.memmap(path, dtype=MAPS_DTYPE, mode=mode, offset=HEADER_SIZE + k * N**2 * MAPS_DTYPE.itemsize, shape=(N, N))
+    for k in range(3)]
+
+
+# ----------------------------------------------------------------
+# Load the statistics lazily: the header as a dictionary, and the read-only memory-mapped maps of the mean height and of
+# the frozen probability, along with the variance of the height (computed on the fly)
+# ----------------------------------------------------------------
+def load_ensemble_stats(path):
+
+  header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+  if header['magic'] != MAGIC or header['version'] != VERSION:
+    print('ERROR: Not an ensemble statistics file (or unsupported version): ' + str(path))
+    sys.exit()
+
+  info = {
+    'N': int(header['N']),
+    'nb_samples': int(header['nb_samples']),
+    'nb_flips': int(header['nb_flips']),
+    'seed': decode_seed(header['seed']),
+    'pattern': header['pattern'].decode()}
+  mean, m2, frozen = map_ensemble_stats(path, 'r', info['N'])
+  variance = m2 / max(info['nb_samples'] - 1, 1)
+  return info, mean, variance, frozen
+
+
+# The statistics of the current chain (disabled unless the chain is thinned into statistics)
+stats = NullStats()
+
+
+# ----------------------------------------------------------------
+# Start new statistics for the current chain, as specified by the parameters (the chain is then thinned every
+# "STATS_ITERX" iterations)
+# ----------------------------------------------------------------
+def start_ensemble_stats(p):
+  global stats
+  if p.STATS_ITERX > 0:
+    stats = EnsembleStats(os.path.join(p.RESULTS_PATH, p.STATS_NAME), p.N, p.INI_PATTERN, p.NB_ITER_FLIP, p.SEED)
+  else:
+    stats = NullStats()
+
+
+# ----------------------------------------------------------------
+# Get the statistics of the current chain
+# ----------------------------------------------------------------
+def get_ensemble_stats():
+  return stats
@@ -0,0 +1,119 @@
+import os
+import math
+import time
+import numpy as np
+from utils import print_iter_msg
+from room_store import load_room
+from hex_geometry import get_floor_and_walls
+from hex_geometry import get_grid_segments
+from hex_geometry import convert_xy_to_lozenge
+from hex_geometry import get_color_theme
+
+
+# ----------------------------------------------------------------
+# Export the hex as a vector image, by streaming its faces into an SVG file from the background to the foreground
+# ----------------------------------------------------------------
+def export_hex_svg(p):
+
+  # Log the progress
+  t_ini = time.time()
+  iterx = 0
+  print_iter_msg('Hex', iterx, p.N, t_ini, t_ini)
+
+  # Map the previously generated room, whose stacks are then read one column at a time
+  room = load_room(os.path.join(p.RESULTS_PATH, p.ROOM_NAME))
+
+  # Get the specified color theme
+  color_edges, color_top, color_lft, color_rgt = get_color_theme(p.COLOR_THEME)
+
+  # Define the translation shift between two neighbor lozenges
+  di = 1
+  dj = math.tan(math.pi / 6)
+
+  with open(os.path.join(p.RESULTS_PATH, p.FILENAME + '.svg'), 'w') as fid:
+
+    # The hexagon spans [-N, N] horizontally, and [-(2N-1), 2N+1] vertical shifts (the vertical axis points downwards)
+    margin = 1
+    view_box = [-p.N*di - margin, -(2*p.N + 1)*dj - margin, 2*p.N*di + 2*margin, 4*p.N*dj + 2*margin]
+    fid.write('<svg xmlns="http://www.w3.org/2000/svg" viewBox="{}">\n'.format(' '.join(format_number(v) for v in view_box)))
+    fid.write('<style>polygon, path {{stroke: {}; stroke-width: 0.05; stroke-linejoin: round; fill: none}} '.format(color_edges))
+    fid.write('.top {{fill: {}}} .lft {{fill: {}}} .rgt {{fill: {}}}</style>\n'.format(color_top, color_lft, color_rgt))
+
+    # Background color
+    if p.DARK_BACKGROUND:
+      fid.write('<rect x="{}" y="{}" width="{}" height="{}" fill="black"/>\n'.format(*[format_number(v) for v in view_box]))
+
+    # Draw the floor, the left wall, the right wall, and their grid
+    if p.DRAW_FLOOR_AND_WALLS:
+      for wall, face_class in zip(get_floor_and_walls(p.N, di, dj), ['top', 'lft', 'rgt']):
+        write_polygon(fid, face_class, wall)
+      fid.write('<path d="')
+      for segment in get_grid_segments(p.N, di, dj):
+        fid.write('M{}L{}'.format(format_vertex(segment[0]), format_vertex(segment[1])))
+      fid.write('"/>\n')
+
+    # Stacks are enumerated from the background to the foreground, namely x-major then y-minor
+    stack_height_column_next = np.asarray(room[:, 0], dtype=np.int64)
+    for x in range(p.N):
+
+      # Only the current column and the next one to the left, at coordinates (x+1, y), are held in memory
+      stack_height_column = stack_height_column_next
+      if x < p.N-1:
+        stack_height_column_next = np.asarray(room[:, x+1], dtype=np.int64)
+      else:
+        stack_height_column_next = np.zeros(p.N, dtype=np.int64)
+
+      for y in range(p.N):
+        stack_height = int(stack_height_column[y])
+        stack_height_next_lft = int(stack_height_column_next[y])
+        stack_height_next_rgt = int(stack_height_column[y+1]) if y < p.N-1 else 0
+        write_stack_faces(fid, x, y, stack_height, stack_height_next_lft, stack_height_next_rgt, di, dj)
+
+      # Log the progress
+      t_now = time.time()
+      print_iter_msg('Hex', x+1, p.N, t_now, t_ini)
+
+    fid.write('</svg>\n')
+
+
+# ----------------------------------------------------------------
+# Write the visible faces of one stack: the top face, and one unit face per cube level that is taller than the next stacks
+# ----------------------------------------------------------------
+def write_stack_faces(fid, x, y, stack_height, stack_height_next_lft, stack_height_next_rgt, di, dj):
+
+  two_dj = 2 * dj
+  top, bot, lft, rgt = convert_xy_to_lozenge(x, y, di, dj)
+
+  # The top face of a non-empty stack (the floor was already handled)
+  if stack_height > 0:
+    k = stack_height * two_dj
+    write_polygon(fid, 'top', [[bot[0], bot[1] + k], [lft[0], lft[1] + k], [top[0], top[1] + k], [rgt[0], rgt[1] + k]])
+
+  # Each side face spans from the front edge (bot) to either the left edge (lft) or the right edge (rgt) of the lozenge
+  for face_class, side, stack_height_next in [('lft', lft, stack_height_next_lft), ('rgt', rgt, stack_height_next_rgt)]:
+    for level in range(stack_height_next, stack_height):
+      k_lo = level * two_dj
+      k_hi = (level + 1) * two_dj
+      write_polygon(fid, face_class, [[bot[0], bot[1] + k_lo], [bot[0], bot[1] + k_hi], [side[0], side[1] + k_hi], [side[0], side[1] + k_lo]])
+
+
+# ----------------------------------------------------------------
+# Write one polygon, whose fill color is given by the class of its face
+# ----------------------------------------------------------------
+def write_polygon(fid, face_class, vertices):
+  fid.write('<polygon class="{}" points="{}"/>\n'.format(face_class, ' '.join(format_vertex(vertex) for vertex in vertices)))
+
+
+# ----------------------------------------------------------------
+# Format a vertex as SVG coordinates (the vertical axis points downwards)
+# ----------------------------------------------------------------
+def format_vertex(vertex):
+  return '{},{}'.format(format_number(vertex[0]), format_number(-vertex[1]))
+
+
+# ----------------------------------------------------------------
+# Format a coordinate with a fixed precision, without trailing zeros
+# ----------------------------------------------------------------
+def format_number(value):
+  text = '{:.4f}'.format(value).rstrip('0').rstrip('.')
+  return '0' if text == '-0' else text
@@ -1,4 +1,6 @@
 import numpy as np
+from room_state import get_row_bands
+from arctic_boundary import extract_arctic_boundary
 
 
 class Fitness:
@@ -16,24 +18,90 @@ class Fitness:
     self.z_full  = None
     self.z_empty = None
 
+    # Counters that allow the metrics to be updated after each flip, instead of being recomputed over the whole room
+    self.volume = None
+    self.nb_violations = None
+
+    # Boundary between the frozen poles and the liquid center, along with the ellipse fitted through it (only assessed on
+    # demand, as it is recomputed over the whole room)
+    self.boundary = None
+
 
   # ----------------------------------------------------------------
   # Assess the room fitness via several patterns and mechanisms
   # ----------------------------------------------------------------
   def assess_room_fitness(self, room, N):
 
-    # Verify whether the monotony condition is respected
-    monotony_x = not np.any(np.diff(room, axis=1) > 0)
-    monotony_y = not np.any(np.diff(room, axis=0) > 0)
-    self.monotony = monotony_x and monotony_y
+    # The room is assessed one band of rows at a time, so that no temporary array is as large as the room itself
+    self.nb_violations = 0
+    self.volume = 0
+    self.z_full = 0
+    self.z_empty = 0
+    for y_ini, y_end in get_row_bands(N):
+      rows = room[y_ini:y_end]
+
+      # Verify whether the monotony condition is respected (including between the first row and the previous band)
+      self.nb_violations += int(np.count_nonzero(rows[:, 1:] > rows[:, :-1]))
+      self.nb_violations += int(np.count_nonzero(rows[1:] > rows[:-1]))
+      if y_ini > 0:
+        self.nb_violations += int(np.count_nonzero(rows[0] > room[y_ini-1]))
+
+      self.volume += int(np.sum(rows, dtype=np.int64))
+      self.z_full += int(np.count_nonzero(rows == N))
+      self.z_empty += int(np.count_nonzero(rows == 0))
+
+    self.monotony = self.nb_violations == 0
 
     # A perfect arctic-circle corresponds to a room that is exactly half-full (or half-empty?), when N is even
-    self.filling = np.sum(room) / N**3
+    self.filling = self.volume / N**3
 
     # Measure the area of the six "poles" of the hex: in case of a perfect arctic circle, all poles have the same area
-    self.x_full  = np.sum(room[:, N-1])
-    self.x_empty = N**2 - np.sum(room[:, 0])
-    self.y_full  = np.sum(room[N-1, :])
-    self.y_empty = N**2 - np.sum(room[0, :])
-    self.z_full  = np.sum(room == N)
-    self.z_empty = np.sum(room == 0)
+    self.x_full  = int(np.sum(room[:, N-1], dtype=np.int64))
+    self.x_empty = N**2 - int(np.sum(room[:, 0], dtype=np.int64))
+    self.y_full  = int(np.sum(room[N-1, :], dtype=np.int64))
+    self.y_empty = N**2 - int(np.sum(room[0, :], dtype=np.int64))
+
+
+  # ----------------------------------------------------------------
+  # Assess the boundary of the arctic circle: centre, radii, angle, and residual of the fitted ellipse (see "Arctic
+  # boundary")
+  # ----------------------------------------------------------------
+  def assess_room_boundary(self, room, N):
+    self.boundary = extract_arctic_boundary(room, N)
+
+
+  # ----------------------------------------------------------------
+  # Update the room fitness after the stack at [x, y] was altered by "flip_sign" cubes (the room is already altered), where
+  # "flip_sign" is either one cube (flips) or any number of cubes (heat-bath moves)
+  # ----------------------------------------------------------------
+  def update_room_fitness(self, room, N, x, y, flip_sign):
+
+    height = room[y, x]
+    height_old = height - flip_sign
+
+    # Only the pairs of neighbors that involve the altered stack can start or stop violating the monotony condition
+    if x > 0:
+      self.nb_violations += int(height > room[y, x-1]) - int(height_old > room[y, x-1])
+    if x < N-1:
+      self.nb_violations += int(room[y, x+1] > height) - int(room[y, x+1] > height_old)
+    if y > 0:
+      self.nb_violations += int(height > room[y-1, x]) - int(height_old > room[y-1, x])
+    if y < N-1:
+      self.nb_violations += int(room[y+1, x] > height) - int(room[y+1, x] > height_old)
+    self.monotony = self.nb_violations == 0
+
+    # Room filling
+    self.volume += flip_sign
+    self.filling = self.volume / N**3
+
+    # Poles: the x/y poles only depend on the stacks along the walls, the z poles on the stacks that are full or empty
+    if x == N-1:
+      self.x_full += flip_sign
+    if x == 0:
+      self.x_empty -= flip_sign
+    if y == N-1:
+      self.y_full += flip_sign
+    if y == 0:
+      self.y_empty -= flip_sign
+    self.z_full += int(height == N) - int(height_old == N)
+    self.z_empty += int(height == 0) - int(height_old == 0)
@@ -0,0 +1,76 @@
+import os
+import sys
+import copy
+import time
+import multiprocessing
+from generate_room import run_room_chain
+from room_store import create_room_store
+from ensemble_stats import EnsembleStats
+from random_stream import RandomStream
+from random_stream import get_random_stream
+from random_stream import set_random_stream
+from utils import print_iter_msg
+
+
+# ----------------------------------------------------------------
+# Generate an ensemble of independent rooms in parallel, and save them as a single batch
+# ----------------------------------------------------------------
+def generate_ensemble(p):
+
+  # A trajectory is recorded for a single chain only (all the samples would otherwise write to the same file)
+  if p.RECORD_TRAJECTORY:
+    print('ERROR: The trajectory cannot be recorded while generating an ensemble (set "RECORD_TRAJECTORY" to False)')
+    sys.exit()
+
+  # Log the progress
+  t_ini = time.time()
+  print_iter_msg('Ensemble', 0, p.NB_SAMPLES, t_ini, t_ini)
+
+  # One independent random stream per sample (reproducible if the random seed was planted in the parameters)
+  sample_seeds = get_random_stream().spawn_seeds(p.NB_SAMPLES)
+
+  # The chains run without interim display, each worker process being in charge of one chain at a time (hence a chain
+  # cannot itself be split among worker processes)
+  p_worker = copy.copy(p)
+  p_worker.SHOW_INTERIM = False
+  p_worker.STATS_ITERX = 0
+
+  # The workers neither save nor resume checkpoints, as all the samples would otherwise share the same checkpoint file
+  # (and would no longer be independent, once resumed from it)
+  p_worker.CHECKPOINT_ITERX = 0
+  p_worker.RESUME = False
+  p_worker.RECORD_TRAJECTORY = False
+  if p_worker.ENGINE == 'parallel_sweep':
+    p_worker.ENGINE = 'sweep'
+
+  # Collect the rooms in the order of their seeds, so that the batch does not depend on the number of workers, and fold
+  # each room into the statistics of the ensemble as soon as it is collected
+  rooms = create_room_store(
+    os.path.join(p.RESULTS_PATH, p.ENSEMBLE_NAME), p.NB_SAMPLES, p.N, p.INI_PATTERN, p.NB_ITER_FLIP, p.SEED)
+  stats = EnsembleStats(os.path.join(p.RESULTS_PATH, p.STATS_NAME), p.N, p.INI_PATTERN, p.NB_ITER_FLIP, p.SEED)
+  with multiprocessing.Pool(processes=p.NB_WORKERS, initializer=silence_worker) as pool:
+    tasks = [(p_worker, sample_seed) for sample_seed in sample_seeds]
+    for sample_idx, room in enumerate(pool.imap(sample_room, tasks)):
+      rooms[sample_idx] = room
+      stats.add(room)
+      t_now = time.time()
+      print_iter_msg('Ensemble', sample_idx+1, p.NB_SAMPLES, t_now, t_ini)
+  rooms.flush()
+  stats.close()
+
+
+# ----------------------------------------------------------------
+# Generate one room of the ensemble, from its own random stream
+# ----------------------------------------------------------------
+def sample_room(task):
+  p, sample_seed = task
+  set_random_stream(RandomStream(sample_seed))
+  room, _, _, _ = run_room_chain(p, time.time())
+  return room
+
+
+# ----------------------------------------------------------------
+# Discard the console output of the worker processes, which would otherwise interleave with the ensemble progress
+# ----------------------------------------------------------------
+def silence_worker():
+  sys.stdout = open(os.devnull, 'w')
@@ -1,13 +1,34 @@
 import sys
 import os
 import numpy as np
-import random
 import time
-import pickle
 import fitness
 from display_room import display_room
-import fitness
+from display_room import start_render_pipeline
+from display_room import stop_render_pipeline
+from move_set import MoveSet
+from room_state import get_room_dtype
+from room_store import save_room
+from checkpoint import save_checkpoint
+from checkpoint import load_checkpoint
+from sweep_room import iterate_sweeps
+from sweep_room import compute_lookups
+from init_room import generate_random_half
+from init_room import generate_limit_shape
+from trajectory import TrajectoryRecorder
+import cftp_room
+import heat_bath_room
+from random_stream import get_random_stream
+from convergence import ConvergenceMonitor
+from convergence import start_convergence_monitor
+from convergence import set_convergence_monitor
+from convergence import get_convergence_monitor
+from ensemble_stats import start_ensemble_stats
+from ensemble_stats import get_ensemble_stats
+from instrumentation import start_instrumentation
+from instrumentation import get_probe
 from utils import print_iter_msg
+from utils import get_boundary_msg
 from utils import stopwatch
 
 
@@ -16,25 +37,147 @@ from utils import stopwatch
 # ----------------------------------------------------------------
 def generate_room(p):
 
-  # Log the progress
+  # Optionally, measure the time spent in each phase of the run
+  start_instrumentation(p)
+  probe = get_probe()
+
+  # The interim frames are optionally rendered in the background, while the chain keeps running
+  start_render_pipeline(p)
+
+  # Run the Markov chain
   t_ini = time.time()
+  room, lookup_add, lookup_rmv, f = run_room_chain(p, t_ini)
+
+  # Save the room (and the statistics of the thinned chain, if any)
+  probe.start()
+  save_room(os.path.join(p.RESULTS_PATH, p.ROOM_NAME), room, p.N, p.INI_PATTERN, p.NB_ITER_FLIP, p.SEED)
+  get_ensemble_stats().close()
+  probe.lap('save')
+
+  # Final display (at the iteration where the chain was stopped, in case it converged early), only if a render was
+  # requested, so that headless runs never load the plotting libraries
+  monitor = get_convergence_monitor()
+  if p.NB_ITER_TOTAL > 0:
+    t_now = time.time()
+    iterx_end = monitor.iterx_stop or p.NB_ITER_TOTAL
+    print_iter_msg('Room', iterx_end, p.NB_ITER_TOTAL, t_now, t_ini)
+    if p.SHOW_INTERIM or p.SHOW_FINAL_ROOM:
+      f.assess_room_fitness(room, p.N)
+      display_room(room, lookup_add, lookup_rmv, t_now, t_ini, p, f, iterx_end, x=0, y=0, flip_sign=0)
+      probe.lap('display')
+    elif p.ENGINE not in ['flip', 'heat_bath']:
+      # (only the flip and heat-bath engines keep the fitness metrics up to date after each move)
+      f.assess_room_fitness(room, p.N)
+      probe.lap('fitness')
+
+  # Wait until all the frames have been rendered
+  stop_render_pipeline()
+  probe.lap('flush')
+
+  # Print the fitness metrics in the console
+  print('Fitness\t| Monotony: {}, Filling: {}, Poles: ({}, {}), ({}, {}), ({}, {})'.format(
+    f.monotony,
+    f.filling,
+    f.x_full,
+    f.x_empty,
+    f.y_full,
+    f.y_empty,
+    f.z_full,
+    f.z_empty))
+
+  # Print the arctic boundary of the final room in the console
+  if p.TRACK_BOUNDARY:
+    f.assess_room_boundary(room, p.N)
+    print('Boundary\t| ' + get_boundary_msg(f.boundary))
+
+  # Print the convergence estimates, and the time spent in each phase
+  monitor.print_summary()
+  probe.print_summary()
+
+
+# ----------------------------------------------------------------
+# Initialize the room and randomly alter it, as specified by the parameters
+# ----------------------------------------------------------------
+def run_room_chain(p, t_ini):
+
+  # Only the flips of the flip engine can be recorded (the other engines alter many stacks at once)
+  if p.RECORD_TRAJECTORY and p.ENGINE != 'flip':
+    print('ERROR: The trajectory can only be recorded with the "flip" engine: ' + str(p.ENGINE))
+    sys.exit()
+
+  # Log the progress
   t_now = t_ini
   iterx = 0
   print_iter_msg('Room', iterx, p.NB_ITER_TOTAL, t_now, t_ini)
 
-  # Room initialization
-  room, lookup_add, lookup_rmv = room_initialization(p.INI_PATTERN, p.N)
+  # Room initialization, or restoration of the chain state from the latest checkpoint (along with the samples of the
+  # convergence monitor, if any, whereas the statistics of the thinned chain always start afresh)
+  start_convergence_monitor(p)
+  start_ensemble_stats(p)
+  checkpoint = load_checkpoint(p) if p.RESUME else None
+  if checkpoint is None:
+    room, lookup_add, lookup_rmv = room_initialization(p.INI_PATTERN, p.N)
+  else:
+    room, lookup_add, lookup_rmv = checkpoint['room'], checkpoint['lookup_add'], checkpoint['lookup_rmv']
+    if p.CONVERGENCE_ESS > 0 and isinstance(checkpoint.get('monitor'), ConvergenceMonitor):
+      checkpoint['monitor'].target_ess = p.CONVERGENCE_ESS
+      set_convergence_monitor(checkpoint['monitor'])
 
-  # Get a "fitness class" (he he he)
+  # Get a "fitness class" (he he he), which is assessed once and then kept up to date after each flip
   f = fitness.Fitness()
+  f.assess_room_fitness(room, p.N)
 
   # Initial display
   if p.SHOW_INTERIM and iterx == 0:
-    f.assess_room_fitness(room, p.N)
     display_room(room, lookup_add, lookup_rmv, t_now, t_ini, p, f, iterx=0, x=0, y=0, flip_sign=0)
 
-  # Iterative flips: cubes are randomly added or removed in the room, legal actions are tracked by the "lookup_" maps
-  for iterx in range(p.NB_ITER_TOTAL):
+  # Randomly alter the room, either one flip at a time, one sweep of all stacks at a time (optionally split into tiles
+  # among worker processes), until coalescence, or one stack resampling at a time
+  if p.ENGINE == 'flip':
+    room, lookup_add, lookup_rmv = iterate_flips(p, room, lookup_add, lookup_rmv, f, t_ini, checkpoint)
+  elif p.ENGINE in ['sweep', 'parallel_sweep']:
+    room, lookup_add, lookup_rmv = iterate_sweeps(p, room, f, t_ini, checkpoint)
+  elif p.ENGINE == 'cftp':
+    room, lookup_add, lookup_rmv = cftp_room.iterate_cftp(p, t_ini)
+  elif p.ENGINE == 'heat_bath':
+    room, lookup_add, lookup_rmv = heat_bath_room.iterate_heat_bath(p, room, lookup_add, lookup_rmv, f, t_ini, checkpoint)
+  else:
+    print('ERROR: Invalid value for parameter "ENGINE": ' + str(p.ENGINE))
+    sys.exit()
+
+  return room, lookup_add, lookup_rmv, f
+
+
+# ----------------------------------------------------------------
+# Iterative flips: cubes are randomly added or removed in the room, legal actions are tracked by the "lookup_" maps
+# ----------------------------------------------------------------
+def iterate_flips(p, room, lookup_add, lookup_rmv, f, t_ini, checkpoint=None):
+
+  # Index the legal actions, so that drawing a cube to flip does not require scanning the "lookup_" maps
+  if checkpoint is None:
+    iterx_start = 0
+    moves_add = MoveSet(lookup_add)
+    moves_rmv = MoveSet(lookup_rmv)
+  else:
+    iterx_start = checkpoint['iterx']
+    moves_add = checkpoint['moves_add']
+    moves_rmv = checkpoint['moves_rmv']
+
+  # Optionally, record each flip (along with periodic keyframes of the room), so that the run can be replayed later on
+  if p.RECORD_TRAJECTORY:
+    recorder = TrajectoryRecorder(
+      os.path.join(p.RESULTS_PATH, p.TRAJECTORY_NAME), room, p.N, iterx_start, max(0, p.NB_ITER_TOTAL - iterx_start),
+      p.KEYFRAME_ITERX)
+
+  # A single uniform number per flip, served from pre-drawn blocks, chooses both the kind of flip and the cube
+  stream = get_random_stream()
+  monitor = get_convergence_monitor()
+  stats = get_ensemble_stats()
+  probe = get_probe()
+  probe.start()
+
+  t_now = t_ini
+  for iterx in range(iterx_start, p.NB_ITER_TOTAL):
 
     # Iteration number after the iteration zero
     iterx_plus_one = iterx +1
@@ -42,48 +185,83 @@ def generate_room(p):
     # Log the progress
     if iterx_plus_one % p.INTERIM_LOG_ITERX == 0:
       t_now = time.time()
-      print_iter_msg('Room', iterx_plus_one, p.NB_ITER_TOTAL, t_now, t_ini)
+      print_iter_msg('Room', iterx_plus_one, p.NB_ITER_TOTAL, t_now, t_ini, f)
+      probe.lap('log')
 
     # Randomly choose whether to add or remove a cube
-    lookup_flip, flip_sign = randomly_choose_add_or_rmv(
-      lookup_add, lookup_rmv, iterx, p.NB_ITER_INIT, p.INI_PATTERN)
+    moves_flip, flip_sign, u = randomly_choose_add_or_rmv(
+      moves_add, moves_rmv, iterx, p.NB_ITER_INIT, p.INI_PATTERN, stream.uniform())
 
     # Randomly select a cube to flip, and retrieve its [x, y] coordinates
-    x, y = randomly_choose_cube(lookup_flip)
+    x, y = randomly_choose_cube(moves_flip, u)
+    probe.lap('select')
 
-    # Alter the cube in the room
+    # Alter the cube in the room, and update the fitness metrics accordingly
     room[y, x] += flip_sign
+    f.update_room_fitness(room, p.N, x, y, flip_sign)
+    probe.lap('fitness')
 
     # Update the possible actions
-    lookup_add = update_lookup_add(lookup_add, room, x, y, p.N)
-    lookup_rmv = update_lookup_rmv(lookup_rmv, room, x, y, p.N)
+    lookup_add = update_lookup_add(lookup_add, room, x, y, p.N, moves_add)
+    lookup_rmv = update_lookup_rmv(lookup_rmv, room, x, y, p.N, moves_rmv)
+    probe.lap('lookups')
+
+    # Record the flip
+    if p.RECORD_TRAJECTORY:
+      recorder.record(iterx, x, y, flip_sign, room)
+      probe.lap('record')
+
+    # Track the arctic boundary, as it forms
+    if p.TRACK_BOUNDARY and iterx_plus_one % p.INTERIM_PRINT_ITERX == 0:
+      f.assess_room_boundary(room, p.N)
+      probe.lap('boundary')
 
     # Intermediate display(s)
     if p.SHOW_INTERIM and iterx_plus_one % p.INTERIM_PRINT_ITERX == 0:
-      f.assess_room_fitness(room, p.N)
       display_room(room, lookup_add, lookup_rmv, t_now, t_ini, p, f, iterx_plus_one, x, y, flip_sign)
+      probe.lap('display')
+
+    # Periodic checkpoint(s)
+    if p.CHECKPOINT_ITERX > 0 and iterx_plus_one % p.CHECKPOINT_ITERX == 0:
+      save_checkpoint(p, get_flip_state(iterx_plus_one, room, lookup_add, lookup_rmv, moves_add, moves_rmv, monitor))
+      probe.lap('checkpoint')
+
+    # Fold the room into the statistics, every "STATS_ITERX" iterations (the initialization phase is not sampled)
+    if p.STATS_ITERX > 0 and iterx_plus_one > p.NB_ITER_INIT and iterx_plus_one % p.STATS_ITERX == 0:
+      stats.add(room)
+      probe.lap('stats')
+
+    # Stop early once the observables have converged (the initialization phase is not sampled)
+    if p.CONVERGENCE_ESS > 0 and iterx_plus_one > p.NB_ITER_INIT and iterx_plus_one % p.CONVERGENCE_ITERX == 0:
+      monitor.sample(f)
+      is_converged = monitor.is_converged(iterx_plus_one)
+      probe.lap('convergence')
+      if is_converged:
+        break
+
+  iterx_end = max(iterx_start, monitor.iterx_stop or p.NB_ITER_TOTAL)
+  if p.RECORD_TRAJECTORY:
+    recorder.close(iterx_end - iterx_start)
+
+  # Final checkpoint, from which the run can later be extended with more flips
+  if p.CHECKPOINT_ITERX > 0:
+    save_checkpoint(p, get_flip_state(iterx_end, room, lookup_add, lookup_rmv, moves_add, moves_rmv, monitor))
 
-  # Save the room
-  with open(os.path.join(p.RESULTS_PATH, p.ROOM_NAME), 'wb') as fid:
-    pickle.dump(room, fid)
+  return room, lookup_add, lookup_rmv
 
-  # Final display
-  if p.NB_ITER_TOTAL > 0:
-    t_now = time.time()
-    print_iter_msg('Room', p.NB_ITER_TOTAL, p.NB_ITER_TOTAL, t_now, t_ini)
-    f.assess_room_fitness(room, p.N)
-    display_room(room, lookup_add, lookup_rmv, t_now, t_ini, p, f, p.NB_ITER_TOTAL, x=0, y=0, flip_sign=0)
 
-  # Print the fitness metrics in the console
-  print('Fitness\t| Monotony: {}, Filling: {}, Poles: ({}, {}), ({}, {}), ({}, {})'.format(
-    f.monotony,
-    f.filling,
-    f.x_full,
-    f.x_empty,
-    f.y_full,
-    f.y_empty,
-    f.z_full,
-    f.z_empty))
+# ----------------------------------------------------------------
+# Gather the complete state of the flip chain, after a given number of iterations
+# ----------------------------------------------------------------
+def get_flip_state(iterx, room, lookup_add, lookup_rmv, moves_add, moves_rmv, monitor):
+  return {
+    'iterx': iterx,
+    'room': room,
+    'lookup_add': lookup_add,
+    'lookup_rmv': lookup_rmv,
+    'moves_add': moves_add,
+    'moves_rmv': moves_rmv,
+    'monitor': monitor}
 
 
 # ----------------------------------------------------------------
@@ -93,18 +271,28 @@ def room_initialization(INI_PATTERN, N):
 
   if INI_PATTERN == 'empty':
     # Empty room: only the cube tucked in the corner (0,0) can be added, no cube can be removed
-    room = np.zeros((N, N), dtype = np.int32)
+    room = np.zeros((N, N), dtype = get_room_dtype(N))
     lookup_add = np.zeros((N, N), dtype = bool)
     lookup_add[0, 0] = True
     lookup_rmv = np.zeros((N, N), dtype = bool)
 
   elif INI_PATTERN == 'full' or INI_PATTERN == 'random_half':
     # Full room: only the outermost cube (N,N) can be removed, no cube can be added
-    room = N * np.ones((N, N), dtype = np.int32)
+    room = np.full((N, N), N, dtype = get_room_dtype(N))
     lookup_add = np.zeros((N, N), dtype = bool)
     lookup_rmv = np.zeros((N, N), dtype = bool)
     lookup_rmv[N-1, N-1] = True
 
+  elif INI_PATTERN == 'random_half_fast':
+    # Random half-full room, built directly instead of being carved from the full room one cube at a time
+    room = generate_random_half(N)
+    lookup_add, lookup_rmv = compute_lookups(room, N)
+
+  elif INI_PATTERN == 'limit_shape':
+    # Expected shape of a random room, as N grows large: the arctic circle, with a smooth transition from the frozen poles
+    room = generate_limit_shape(N)
+    lookup_add, lookup_rmv = compute_lookups(room, N)
+
   elif INI_PATTERN == 'poles_2_6_10':
     # Fill the room up to the plane defined by the three hex vertices that are the closest to the corner (0,0)
     thresh = N
@@ -137,59 +325,53 @@ def room_initialization(INI_PATTERN, N):
 def generate_poles(N, thresh, offset):
   offset_rmv = offset +1
   offset_add = offset -1
-  room = np.zeros((N, N), dtype = np.int32)
-  lookup_add = np.zeros((N, N), dtype = bool)
-  lookup_rmv = np.zeros((N, N), dtype = bool)
-  for x in range(N):
-    for y in range(N):
-      room[y, x] = min(max(thresh - (x + y + offset), 0), N)
-      neighbor = min(max(thresh - (x + y + offset_add), 0), N)
-      lookup_add[y, x] = room[y, x] - neighbor
-      neighbor = min(max(thresh - (x + y + offset_rmv), 0), N)
-      lookup_rmv[y, x] = neighbor - room[y, x]
+  y, x = np.indices((N, N))
+  room = np.clip(thresh - (x + y + offset), 0, N).astype(get_room_dtype(N))
+  lookup_add = room != np.clip(thresh - (x + y + offset_add), 0, N)
+  lookup_rmv = np.clip(thresh - (x + y + offset_rmv), 0, N) != room
   return room, lookup_add, lookup_rmv
 
 
 # ----------------------------------------------------------------
-# Randomly choose a cube that can be either added or removed (as specified by "lookup") and get its [x, y] coordinates
+# Randomly choose a cube that can be either added or removed (as specified by "moves") and get its [x, y] coordinates,
+# from a uniform number in [0, 1)
 # ----------------------------------------------------------------
-def randomly_choose_cube(lookup):
-  idx = np.random.randint(low=0, high=lookup.sum())
-  pos = np.argwhere(lookup)[idx]
-  x = pos[1]
-  y = pos[0]
+def randomly_choose_cube(moves, u):
+  idx = min(int(u * moves.size), moves.size - 1)
+  x, y = moves.get_xy(idx)
   return x, y
 
 
 # ----------------------------------------------------------------
-# Randomly choose whether to add or remove a cube
+# Randomly choose whether to add or remove a cube, from a uniform number in [0, 1), which is then rescaled to [0, 1) so
+# that it can be reused to choose the cube
 # ----------------------------------------------------------------
-def randomly_choose_add_or_rmv(lookup_add, lookup_rmv, iterx, NB_ITER_INIT, INI_PATTERN):
+def randomly_choose_add_or_rmv(moves_add, moves_rmv, iterx, NB_ITER_INIT, INI_PATTERN, u):
 
   if INI_PATTERN == 'random_half' and iterx < NB_ITER_INIT:
     # Cubes can only be removed, until a random configuration is reached where the room is half-full
-    lookup_flip = lookup_rmv
+    moves_flip = moves_rmv
     flip_sign = -1
 
   else:
     # Cubes can be added or removed
-    weight_add = lookup_add.sum() / (lookup_add.sum() + lookup_rmv.sum())
-    weight_rmv = 1.0 - weight_add
-    add_or_rmv = random.choices(population = ['add', 'rmv'], weights = [weight_add, weight_rmv])[0]
-    if add_or_rmv == 'add':
-      lookup_flip = lookup_add
+    weight_add = moves_add.size / (moves_add.size + moves_rmv.size)
+    if u < weight_add:
+      moves_flip = moves_add
       flip_sign = +1
+      u = u / weight_add
     else:
-      lookup_flip = lookup_rmv
+      moves_flip = moves_rmv
       flip_sign = -1
+      u = (u - weight_add) / (1.0 - weight_add)
 
-  return lookup_flip, flip_sign
+  return moves_flip, flip_sign, u
 
 
 # ----------------------------------------------------------------
 # Update the Boolean lookup map that indicates where cubes could be added
 # ----------------------------------------------------------------
-def update_lookup_add(lookup_add, room, x, y, N):
+def update_lookup_add(lookup_add, room, x, y, N, moves_add=None):
 
   # Enable self, if own height became strictly smaller than the height of the x/y previous neighbor
   if x == 0 and y == 0:
@@ -240,13 +422,19 @@ def update_lookup_add(lookup_add, room, x, y, N):
         if room[y+1, x-1] > room[y+1, x]:
           lookup_add[y+1, x] = True
 
+  # Keep the indexed move set in sync with the three positions that may have been altered
+  if moves_add is not None:
+    moves_add.sync(lookup_add, x, y)
+    moves_add.sync(lookup_add, x+1, y)
+    moves_add.sync(lookup_add, x, y+1)
+
   return lookup_add
 
 
 # ----------------------------------------------------------------
 # Update the Boolean lookup map that indicates where cubes could be removed
 # ----------------------------------------------------------------
-def update_lookup_rmv(lookup_rmv, room, x, y, N):
+def update_lookup_rmv(lookup_rmv, room, x, y, N, moves_rmv=None):
 
   N_MINUS_ONE = N-1
 
@@ -288,4 +476,10 @@ def update_lookup_rmv(lookup_rmv, room, x, y, N):
         if room[y-1, x] > room[y-1, x+1]:
           lookup_rmv[y-1, x] = True
 
+  # Keep the indexed move set in sync with the three positions that may have been altered
+  if moves_rmv is not None:
+    moves_rmv.sync(lookup_rmv, x, y)
+    moves_rmv.sync(lookup_rmv, x-1, y)
+    moves_rmv.sync(lookup_rmv, x, y-1)
+
   return lookup_rmv
@@ -0,0 +1,130 @@
+import time
+import generate_room
+from display_room import display_room
+from checkpoint import save_checkpoint
+from sweep_room import carve_room
+from sweep_room import get_parity_masks
+from sweep_room import compute_lookups
+from random_stream import get_random_stream
+from convergence import get_convergence_monitor
+from ensemble_stats import get_ensemble_stats
+from instrumentation import get_probe
+from utils import print_iter_msg
+
+
+# ----------------------------------------------------------------
+# Iterative heat-bath moves: a random stack is resampled at once, uniformly among all the heights that keep the room
+# monotone, so that a column can travel over several levels in a single move
+# ----------------------------------------------------------------
+def iterate_heat_bath(p, room, lookup_add, lookup_rmv, f, t_ini, checkpoint=None):
+
+  stream = get_random_stream()
+  monitor = get_convergence_monitor()
+  stats = get_ensemble_stats()
+  probe = get_probe()
+  probe.start()
+
+  # Carve the room until it is half-full, by only removing cubes (unless resuming, as carving precedes any checkpoint)
+  if checkpoint is None:
+    iterx_start = 0
+    if p.INI_PATTERN == 'random_half':
+      carve_room(room, p.N, get_parity_masks(p.N), p.NB_ITER_INIT)
+      lookup_add, lookup_rmv = compute_lookups(room, p.N)
+      f.assess_room_fitness(room, p.N)
+      probe.lap('carve')
+  else:
+    iterx_start = checkpoint['iterx']
+
+  # Resample the room, and periodically display it (the iteration count is expressed as a number of moves)
+  t_now = t_ini
+  for iterx in range(iterx_start, p.NB_ITER_FLIP):
+
+    # Iteration number after the iteration zero
+    iterx_plus_one = iterx +1
+
+    # Log the progress
+    if iterx_plus_one % p.INTERIM_LOG_ITERX == 0:
+      t_now = time.time()
+      print_iter_msg('Heat bath', iterx_plus_one, p.NB_ITER_FLIP, t_now, t_ini, f)
+      probe.lap('log')
+
+    # Randomly select a stack, and resample its height within the interval allowed by its neighbors
+    x, y = randomly_choose_stack(p.N, stream.uniform())
+    height_min, height_max = get_height_interval(room, p.N, x, y)
+    delta = height_min + int(stream.uniform() * (height_max - height_min + 1)) - int(room[y, x])
+    probe.lap('select')
+
+    # Alter the stack in the room, and update the fitness metrics and the possible actions accordingly
+    if delta != 0:
+      room[y, x] += delta
+      f.update_room_fitness(room, p.N, x, y, delta)
+      probe.lap('fitness')
+      lookup_add = generate_room.update_lookup_add(lookup_add, room, x, y, p.N)
+      lookup_rmv = generate_room.update_lookup_rmv(lookup_rmv, room, x, y, p.N)
+      probe.lap('lookups')
+
+    # Track the arctic boundary, as it forms
+    if p.TRACK_BOUNDARY and iterx_plus_one % p.INTERIM_PRINT_ITERX == 0:
+      f.assess_room_boundary(room, p.N)
+      probe.lap('boundary')
+
+    # Intermediate display(s)
+    if p.SHOW_INTERIM and iterx_plus_one % p.INTERIM_PRINT_ITERX == 0:
+      display_room(
+        room, lookup_add, lookup_rmv, t_now, t_ini, p, f, p.NB_ITER_INIT + iterx_plus_one, x, y, int(delta > 0) - int(delta < 0))
+      probe.lap('display')
+
+    # Periodic checkpoint(s)
+    if p.CHECKPOINT_ITERX > 0 and iterx_plus_one % p.CHECKPOINT_ITERX == 0:
+      save_checkpoint(p, get_heat_bath_state(iterx_plus_one, room, lookup_add, lookup_rmv, monitor))
+      probe.lap('checkpoint')
+
+    # Fold the room into the statistics
+    if p.STATS_ITERX > 0 and iterx_plus_one % p.STATS_ITERX == 0:
+      stats.add(room)
+      probe.lap('stats')
+
+    # Stop early once the observables have converged
+    if p.CONVERGENCE_ESS > 0 and iterx_plus_one % p.CONVERGENCE_ITERX == 0:
+      monitor.sample(f)
+      is_converged = monitor.is_converged(p.NB_ITER_INIT + iterx_plus_one)
+      probe.lap('convergence')
+      if is_converged:
+        break
+
+  # Final checkpoint, from which the run can later be extended with more moves
+  if p.CHECKPOINT_ITERX > 0:
+    iterx_end = max(iterx_start, monitor.iterx_stop - p.NB_ITER_INIT if monitor.iterx_stop else p.NB_ITER_FLIP)
+    save_checkpoint(p, get_heat_bath_state(iterx_end, room, lookup_add, lookup_rmv, monitor))
+
+  return room, lookup_add, lookup_rmv
+
+
+# ----------------------------------------------------------------
+# Gather the complete state of the heat-bath chain, after a given number of moves
+# ----------------------------------------------------------------
+def get_heat_bath_state(iterx, room, lookup_add, lookup_rmv, monitor):
+  return {
+    'iterx': iterx,
+    'room': room,
+    'lookup_add': lookup_add,
+    'lookup_rmv': lookup_rmv,
+    'monitor': monitor}
+
+
+# ----------------------------------------------------------------
+# Randomly choose one of the N^2 stacks and get its [x, y] coordinates, from a uniform number in [0, 1)
+# ----------------------------------------------------------------
+def randomly_choose_stack(N, u):
+  idx = min(int(u * N**2), N**2 - 1)
+  return idx % N, idx // N
+
+
+# ----------------------------------------------------------------
+# Get the interval of heights that the stack at [x, y] can take: it cannot be higher than its x/y previous neighbors
+# (the walls count as full stacks), nor lower than its x/y next neighbors (the void counts as empty stacks)
+# ----------------------------------------------------------------
+def get_height_interval(room, N, x, y):
+  height_max = min(room[y, x-1] if x > 0 else N, room[y-1, x] if y > 0 else N)
+  height_min = max(room[y, x+1] if x < N-1 else 0, room[y+1, x] if y < N-1 else 0)
+  return int(height_min), int(height_max)
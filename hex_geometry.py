@@ -0,0 +1,269 @@
+import sys
+import numpy as np
+
+
+# RGB values of the named colors of the color themes, for the renderers that do not rely on matplotlib
+COLOR_RGB = {
+  'black': (0, 0, 0),
+  'white': (255, 255, 255),
+  'orangered': (255, 69, 0),
+  'yellowgreen': (154, 205, 50),
+  'steelblue': (70, 130, 180),
+  'dimgray': (105, 105, 105),
+  'lightcyan': (224, 255, 255),
+  'thistle': (216, 191, 216),
+  'khaki': (240, 230, 140),
+  'darkred': (139, 0, 0),
+  'linen': (250, 240, 230),
+  'crimson': (220, 20, 60),
+  'lightpink': (255, 182, 193),
+  'darkolivegreen': (85, 107, 47),
+  'palegreen': (152, 251, 152),
+  'darkseagreen': (143, 188, 143),
+  'chartreuse': (127, 255, 0),
+  'darkslategray': (47, 79, 79),
+  'paleturquoise': (175, 238, 238),
+  'skyblue': (135, 206, 235),
+  'darkcyan': (0, 139, 139),
+  'darkturquoise': (0, 206, 209),
+  'cyan': (0, 255, 255),
+  'purple': (128, 0, 128),
+  'lavenderblush': (255, 240, 245),
+  'orchid': (218, 112, 214),
+  'plum': (221, 160, 221),
+  'saddlebrown': (139, 69, 19),
+  'lemonchiffon': (255, 250, 205),
+  'darkgoldenrod': (184, 134, 11),
+  'gold': (255, 215, 0),
+  'whitesmoke': (245, 245, 245),
+  'silver': (192, 192, 192)}
+
+
+# ----------------------------------------------------------------
+# Get the room coordinates (x, y) and the cube level of each visible face of the stacks, for the top, left, and right faces
+# ----------------------------------------------------------------
+def get_face_levels(room, N, with_floor_and_walls=False):
+
+  # Stacks are enumerated from the background to the foreground, namely x-major then y-minor
+  x, y = np.meshgrid(np.arange(N), np.arange(N), indexing='ij')
+  stack_height = np.asarray(room).T.astype(np.int64)
+
+  # Get the heights of the next stacks to the left, at coordinates (x+1, y), and to the right, at coordinates (x, y+1)
+  stack_height_next_lft = np.zeros_like(stack_height)
+  stack_height_next_lft[:-1, :] = stack_height[1:, :]
+  stack_height_next_rgt = np.zeros_like(stack_height)
+  stack_height_next_rgt[:, :-1] = stack_height[:, 1:]
+
+  # The top face of each non-empty stack (the top faces of the empty stacks make the floor)
+  if with_floor_and_walls:
+    is_visible = np.ones_like(stack_height, dtype=bool)
+  else:
+    is_visible = stack_height > 0
+  levels_top = (x[is_visible], y[is_visible], stack_height[is_visible])
+
+  # One unit face per cube level where self is taller than the next stack to the left (resp. to the right)
+  levels_lft = get_side_levels(x, y, stack_height, stack_height_next_lft)
+  levels_rgt = get_side_levels(x, y, stack_height, stack_height_next_rgt)
+
+  # The walls are made of the side faces of full stacks standing right behind the room, at x = -1 and at y = -1
+  if with_floor_and_walls:
+    wall = np.arange(N)[np.newaxis, :]
+    full = N * np.ones_like(wall)
+    levels_lft = concatenate_levels(get_side_levels(-np.ones_like(wall), wall, full, stack_height[:1, :]), levels_lft)
+    levels_rgt = concatenate_levels(get_side_levels(wall, -np.ones_like(wall), full, stack_height[:, :1].T), levels_rgt)
+
+  return levels_top, levels_lft, levels_rgt
+
+
+# ----------------------------------------------------------------
+# Enumerate the cube levels between the height of the next stack (included) and the height of self (excluded)
+# ----------------------------------------------------------------
+def get_side_levels(x, y, stack_height, stack_height_next):
+  nb_levels = np.maximum(stack_height - stack_height_next, 0).ravel()
+  first_level = np.cumsum(nb_levels) - nb_levels
+  level = np.arange(nb_levels.sum()) - np.repeat(first_level, nb_levels) + np.repeat(stack_height_next.ravel(), nb_levels)
+  return np.repeat(x.ravel(), nb_levels), np.repeat(y.ravel(), nb_levels), level
+
+
+# ----------------------------------------------------------------
+# Concatenate two sets of face levels, the first one being in the background of the second one
+# ----------------------------------------------------------------
+def concatenate_levels(levels_a, levels_b):
+  return tuple(np.concatenate([a, b]) for a, b in zip(levels_a, levels_b))
+
+
+# ----------------------------------------------------------------
+# Get the four vertices of each visible face of the stacks, for the top, left, and right faces (shape: [nb_faces, 4, 2])
+# ----------------------------------------------------------------
+def get_visible_faces(room, N, di, dj, with_floor_and_walls=False):
+  levels_top, levels_lft, levels_rgt = get_face_levels(room, N, with_floor_and_walls)
+  faces_top = get_face_vertices(levels_top, 'top', di, dj)
+  faces_lft = get_face_vertices(levels_lft, 'lft', di, dj)
+  faces_rgt = get_face_vertices(levels_rgt, 'rgt', di, dj)
+  return faces_top, faces_lft, faces_rgt
+
+
+# ----------------------------------------------------------------
+# Get the four vertices of a set of faces of the same type (shape: [nb_faces, 4, 2])
+# ----------------------------------------------------------------
+def get_face_vertices(levels, face_type, di, dj):
+
+  two_dj = 2 * dj
+  x, y, level = levels
+  top, bot, lft, rgt = convert_xy_to_lozenge(x, y, di, dj)
+  k_lo = level * two_dj
+  k_hi = (level + 1) * two_dj
+
+  # The top face is the lozenge lifted at the stack height, a side face spans from the front edge to the left/right edge
+  if face_type == 'top':
+    vertices = [[bot, k_lo], [lft, k_lo], [top, k_lo], [rgt, k_lo]]
+  elif face_type == 'lft':
+    vertices = [[bot, k_lo], [bot, k_hi], [lft, k_hi], [lft, k_lo]]
+  else:
+    vertices = [[bot, k_lo], [bot, k_hi], [rgt, k_hi], [rgt, k_lo]]
+
+  return np.stack([np.stack([vertex[0], vertex[1] + k], axis=-1) for vertex, k in vertices], axis=1)
+
+
+# ----------------------------------------------------------------
+# Get the four vertices of the floor, of the left wall, and of the right wall (shape: [3, 4, 2])
+# ----------------------------------------------------------------
+def get_floor_and_walls(N, di, dj):
+
+  two_dj = 2 * dj
+
+  # Convert room coordinates (x, y) into a set of four 2D coordinates for the corresponding lozenge tile vertices
+  top, _, _, _ = convert_xy_to_lozenge(0, 0, di, dj)
+  _, bot, _, _ = convert_xy_to_lozenge(N-1, N-1, di, dj)
+  _, _, lft, _ = convert_xy_to_lozenge(N-1, 0, di, dj)
+  _, _, _, rgt = convert_xy_to_lozenge(0, N-1, di, dj)
+
+  # Seven vertices to define the floor (b-e-a-c), the left wall (b-g-d-c), and the right wall (b-g-f-e)
+  vertex_a = [bot[0], bot[1]]
+  vertex_b = [top[0], top[1]]
+  vertex_c = [rgt[0], rgt[1]]
+  vertex_d = [rgt[0], rgt[1] + N*two_dj]
+  vertex_e = [lft[0], lft[1]]
+  vertex_f = [lft[0], lft[1] + N*two_dj]
+  vertex_g = [top[0], top[1] + N*two_dj]
+
+  return np.array([
+    [vertex_b, vertex_e, vertex_a, vertex_c],
+    [vertex_b, vertex_g, vertex_d, vertex_c],
+    [vertex_b, vertex_g, vertex_f, vertex_e]])
+
+
+# ----------------------------------------------------------------
+# Get the segments of the grid on the floor, on the left wall, and on the right wall (shape: [nb_segments, 2, 2])
+# ----------------------------------------------------------------
+def get_grid_segments(N, di, dj):
+
+  two_dj = 2 * dj
+  segments = []
+
+  # Grid on the floor
+  for x in range(N+1):
+    top, _, _, _ = convert_xy_to_lozenge(x, 0, di, dj)
+    segments.append([[top[0], top[1]], [top[0] + N*di, top[1] - N*dj]])
+  for y in range(N+1):
+    top, _, _, _ = convert_xy_to_lozenge(0, y, di, dj)
+    segments.append([[top[0], top[1]], [top[0] - N*di, top[1] - N*dj]])
+
+  # Grid on the left wall
+  for y in range(N+1):
+    top, _, _, _ = convert_xy_to_lozenge(0, y, di, dj)
+    segments.append([[top[0], top[1]], [top[0], top[1] + N*two_dj]])
+  top, _, _, _ = convert_xy_to_lozenge(0, 0, di, dj)
+  _, _, _, rgt = convert_xy_to_lozenge(0, N-1, di, dj)
+  for k in range(1, N+1): # (start from 1 because has already been traced as part of the floor)
+    segments.append([[top[0], top[1] + k*two_dj], [rgt[0], rgt[1] + k*two_dj]])
+
+  # Grid on the right wall
+  for x in range(1, N+1): # (start from 1 because has already been traced as part of the left wall)
+    top, _, _, _ = convert_xy_to_lozenge(x, 0, di, dj)
+    segments.append([[top[0], top[1]], [top[0], top[1] + N*two_dj]])
+  top, _, _, _ = convert_xy_to_lozenge(0, 0, di, dj)
+  _, _, lft, _ = convert_xy_to_lozenge(N-1, 0, di, dj)
+  for k in range(1, N+1): # (start from 1 because has already been traced as part of the floor)
+    segments.append([[top[0], top[1] + k*two_dj], [lft[0], lft[1] + k*two_dj]])
+
+  return np.array(segments)
+
+
+# ----------------------------------------------------------------
+# Convert room coordinates (x, y) into a set of four 2D coordinates for the corresponding lozenge tile vertices
+# ----------------------------------------------------------------
+def convert_xy_to_lozenge(x, y, di, dj):
+  i = (-x + y) * di
+  j = -(x + y) * dj
+  top = [i, j + dj]
+  bot = [i, j - dj]
+  lft = [i - di, j]
+  rgt = [i + di, j]
+  return top, bot, lft, rgt
+
+
+# ----------------------------------------------------------------
+# Set the color theme
+# ----------------------------------------------------------------
+def get_color_theme(COLOR_THEME):
+
+  if COLOR_THEME == 'rgb':
+    color_edges = 'black'
+    color_top = 'orangered'
+    color_lft = 'yellowgreen'
+    color_rgt = 'steelblue'
+
+  elif COLOR_THEME == 'cmy':
+    color_edges = 'dimgray'
+    color_top = 'lightcyan'
+    color_lft = 'thistle'
+    color_rgt = 'khaki'
+
+  elif COLOR_THEME == 'strawberry_explosion':
+    color_edges = 'darkred'
+    color_top = 'linen'
+    color_lft = 'crimson'
+    color_rgt = 'lightpink'
+
+  elif COLOR_THEME == 'alien_vomit':
+    color_edges = 'darkolivegreen'
+    color_top = 'palegreen'
+    color_lft = 'darkseagreen'
+    color_rgt = 'chartreuse'
+
+  elif COLOR_THEME == 'frozen_tango':
+    color_edges = 'darkslategray'
+    color_top = 'paleturquoise'
+    color_lft = 'steelblue'
+    color_rgt = 'skyblue'
+
+  elif COLOR_THEME == 'cosmic_penguin':
+    color_edges = 'darkcyan'
+    color_top = 'lightcyan'
+    color_lft = 'darkturquoise'
+    color_rgt = 'cyan'
+
+  elif COLOR_THEME == 'magic_apocalypse':
+    color_edges = 'purple'
+    color_top = 'lavenderblush'
+    color_lft = 'orchid'
+    color_rgt = 'plum'
+
+  elif COLOR_THEME == 'eldorado_craze':
+    color_edges = 'saddlebrown'
+    color_top = 'lemonchiffon'
+    color_lft = 'darkgoldenrod'
+    color_rgt = 'gold'
+
+  elif COLOR_THEME == 'noir_joke':
+    color_edges = 'black'
+    color_top = 'whitesmoke'
+    color_lft = 'dimgray'
+    color_rgt = 'silver'
+
+  else:
+    print('ERROR: Invalid value for parameter "COLOR_THEME": ' + str(COLOR_THEME))
+    sys.exit()
+
+  return color_edges, color_top, color_lft, color_rgt
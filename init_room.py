@@ -0,0 +1,202 @@
+import numpy as np
+from room_state import get_room_dtype
+from room_state import get_row_bands
+from room_state import compute_lookups_rows
+from random_stream import get_random_stream
+from sweep_room import get_parity_masks_rows
+
+
+# Amplitude of the noise that roughens the half-full plane (in cubes), before the monotony is enforced
+ROUGHNESS = 4
+
+# Largest number of nodes of the grid along which the limit shape is tabulated, along each axis
+LIMIT_SHAPE_MAX_NODES = 2049
+
+
+# ----------------------------------------------------------------
+# Build a random room that is exactly half-full (with the same volume as after the "random_half" carving) directly in
+# O(N^2), instead of carving the full room one cube at a time
+# ----------------------------------------------------------------
+def generate_random_half(N):
+
+  stream = get_random_stream()
+  volume = N**3 - N**3 // 2
+
+  # The same noisy field is generated twice (from the same seed): once to find the offset that yields the volume that is
+  # the closest to the target, and once to fill the room, so that only one band of rows is ever held in memory
+  seed = stream.spawn_seeds(1)[0]
+  histogram = np.zeros(5*N + 1, dtype=np.int64)
+  for _, _, field in iterate_monotone_field(N, seed):
+    histogram += np.bincount(np.clip(field, -2*N, 3*N).ravel() + 2*N, minlength=5*N + 1)
+  offset = get_volume_offset(histogram, N, volume)
+
+  room = np.empty((N, N), dtype=get_room_dtype(N))
+  for y_ini, y_end, field in iterate_monotone_field(N, seed):
+    room[y_ini:y_end] = np.clip(field + offset, 0, N)
+
+  # Remove or add the last few cubes
+  adjust_room_volume(room, N, volume, stream)
+  return room
+
+
+# ----------------------------------------------------------------
+# Iterate over the bands of rows of a noisy plane, made monotone by cumulative minima along x and y (the running minimum
+# along y is carried from one band to the next)
+# ----------------------------------------------------------------
+def iterate_monotone_field(N, seed):
+  rng = np.random.default_rng(seed)
+  x = np.arange(N)
+  carry = None
+  for y_ini, y_end in get_row_bands(N):
+    y = np.arange(y_ini, y_end)[:, None]
+    field = np.floor(1.5*N - x - y + ROUGHNESS * rng.random((y_end - y_ini, N))).astype(np.int64)
+    np.minimum.accumulate(field, axis=1, out=field)
+    if carry is not None:
+      np.minimum(field[0], carry, out=field[0])
+    np.minimum.accumulate(field, axis=0, out=field)
+    carry = field[-1].copy()
+    yield y_ini, y_end, field
+
+
+# ----------------------------------------------------------------
+# Get the offset such that the field, once offset and clipped to [0, N], has the volume that is the closest to the target
+# (the volume of each offset is computed from the histogram of the field values, which start at -2N)
+# ----------------------------------------------------------------
+def get_volume_offset(histogram, N, volume):
+  values = np.arange(-2*N, 3*N + 1)
+  get_volume = lambda offset: int(np.dot(histogram, np.clip(values + offset, 0, N)))
+
+  # The volume is non-decreasing with the offset: bisect for the smallest offset whose volume reaches the target
+  offset_min, offset_max = -N, N
+  while offset_min < offset_max:
+    offset = (offset_min + offset_max) // 2
+    if get_volume(offset) < volume:
+      offset_min = offset + 1
+    else:
+      offset_max = offset
+  if offset_min > -N and volume - get_volume(offset_min - 1) < get_volume(offset_min) - volume:
+    return offset_min - 1
+  return offset_min
+
+
+# ----------------------------------------------------------------
+# Add or remove cubes until the room reaches the given volume, by randomly flipping the legal stacks of one parity class
+# at a time (within a class, stacks are never adjacent, hence they can all be flipped at once)
+# ----------------------------------------------------------------
+def adjust_room_volume(room, N, volume, stream):
+
+  bands = get_row_bands(N)
+  nb_cubes = volume - int(sum(np.sum(room[y_ini:y_end], dtype=np.int64) for y_ini, y_end in bands))
+  class_idx = 0
+  while nb_cubes != 0:
+    flip_sign = 1 if nb_cubes > 0 else -1
+
+    # Bands are visited in a random order, so that the last cubes are not always flipped in the same rows
+    for band_idx in stream.choice(np.arange(len(bands)), len(bands)):
+      y_ini, y_end = bands[band_idx]
+      lookup_add, lookup_rmv = compute_lookups_rows(room, N, y_ini, y_end)
+      lookup_flip = lookup_add if flip_sign > 0 else lookup_rmv
+      is_class = get_parity_masks_rows(N, y_ini, y_end)[class_idx]
+      candidates = np.flatnonzero(lookup_flip & is_class & (stream.random((y_end - y_ini, N)) < 0.5))
+      if candidates.size > abs(nb_cubes):
+        candidates = stream.choice(candidates, abs(nb_cubes))
+      room[y_ini:y_end].ravel()[candidates] += flip_sign
+      nb_cubes -= flip_sign * candidates.size
+      if nb_cubes == 0:
+        break
+
+    class_idx = 1 - class_idx
+
+
+# ----------------------------------------------------------------
+# Build the room that follows the limit shape of uniformly random rooms (the expected shape as N grows large): frozen
+# poles outside of the arctic circle, and a smooth surface within
+# ----------------------------------------------------------------
+def generate_limit_shape(N):
+
+  # The surface is tabulated in the hex coordinates [p, q] = [x - z, y - z], normalized by N, on a grid that matches the
+  # lattice of the room when it is not too large
+  nb_nodes = min(2*N, LIMIT_SHAPE_MAX_NODES - 1) + 1
+  surface = get_limit_surface(nb_nodes)
+
+  # The cube [x, y, z] is in the room if its center lies below the surface, i.e., if z + 1/2 < surface(x - z, y - z), which
+  # is monotone in z: the height of each stack is found by bisection
+  room = np.empty((N, N), dtype=get_room_dtype(N))
+  x = np.arange(N)[None, :]
+  for y_ini, y_end in get_row_bands(N):
+    y = np.arange(y_ini, y_end)[:, None]
+    height_min = np.zeros((y_end - y_ini, N), dtype=np.int64)
+    height_max = np.full((y_end - y_ini, N), N, dtype=np.int64)
+    while np.any(height_min < height_max):
+      z = (height_min + height_max) // 2
+      is_inside = z + 0.5 < N * interpolate_surface(surface, (x - z) / N, (y - z) / N)
+      height_min = np.where(is_inside, z + 1, height_min)
+      height_max = np.where(is_inside, height_max, z)
+    room[y_ini:y_end] = height_min
+
+  # The tabulated surface is only approximately monotone: enforce the monotony (this only alters a few rounded stacks)
+  np.minimum.accumulate(room, axis=1, out=room)
+  np.minimum.accumulate(room, axis=0, out=room)
+  return room
+
+
+# ----------------------------------------------------------------
+# Tabulate the limit surface z = surface(p, q), over a regular grid of [-1, 1] x [-1, 1] (normalized hex coordinates)
+# ----------------------------------------------------------------
+def get_limit_surface(nb_nodes):
+
+  # The slope of the surface is given by the densities of faces: along p, one level is lost per face normal to x
+  q, p = np.meshgrid(np.linspace(-1, 1, nb_nodes), np.linspace(-1, 1, nb_nodes), indexing='ij')
+  density_x = get_face_densities(p, q)[1]
+
+  # Integrate the slope along each row, from the left side of the hex (where the surface is known)
+  surface = np.empty((nb_nodes, nb_nodes))
+  step = 2 / (nb_nodes - 1)
+  for i in range(nb_nodes):
+    j_ini = max(0, i - (nb_nodes - 1) // 2)
+    surface[i, j_ini] = 1 - max(q[i, 0], 0)
+    surface[i, j_ini+1:] = surface[i, j_ini] - step * np.cumsum(0.5 * (density_x[i, j_ini:-1] + density_x[i, j_ini+1:]))
+    # (beyond the hex, the surface is only extended so that it can be interpolated up to the border)
+    surface[i, :j_ini] = surface[i, j_ini] + step * np.arange(j_ini, 0, -1)
+  return surface
+
+
+# ----------------------------------------------------------------
+# Get the densities of the faces that are normal to z, x, and y, at [p, q] (normalized hex coordinates)
+# ----------------------------------------------------------------
+def get_face_densities(p, q):
+
+  # Within the arctic circle (an ellipse in the hex coordinates), the densities are the angles of the triangle [0, 1, w]
+  # divided by pi, where w is the complex slope: the root with a positive imaginary part of a*w^2 + b*w + c = 0, so that
+  # the line through [p, q] with the normal (1-w, w) is tangent to the arctic circle
+  is_liquid = p**2 - p*q + q**2 < 0.75
+  a = (q[is_liquid] - p[is_liquid])**2 - 1
+  b = 2 * p[is_liquid] * (q[is_liquid] - p[is_liquid]) + 1
+  c = p[is_liquid]**2 - 1
+  w = (-b - 1j * np.sqrt(np.maximum(4*a*c - b**2, 0))) / (2 * a)
+
+  # Beyond the arctic circle, the six frozen poles are six 60-degree sectors, in which all faces have the same normal: x
+  # (2 and 8 o'clock), z (6 and 12 o'clock), or y (4 and 10 o'clock)
+  angle = np.degrees(np.arctan2(-(p + q) / 2, (q - p) * np.sqrt(3) / 2))
+  pole = np.round((angle - 30) / 60).astype(np.int64) % 3
+  densities = np.stack([pole == 1, pole == 0, pole == 2]).astype(np.float64)
+  densities[1][is_liquid] = np.angle(w) / np.pi
+  densities[2][is_liquid] = -np.angle(1 - w) / np.pi
+  densities[0][is_liquid] = 1 - densities[1][is_liquid] - densities[2][is_liquid]
+  return densities
+
+
+# ----------------------------------------------------------------
+# Bilinear interpolation of the tabulated surface at [p, q] (normalized hex coordinates)
+# ----------------------------------------------------------------
+def interpolate_surface(surface, p, q):
+  nb_nodes = surface.shape[0]
+  i = np.clip((q + 1) * (nb_nodes - 1) / 2, 0, nb_nodes - 1)
+  j = np.clip((p + 1) * (nb_nodes - 1) / 2, 0, nb_nodes - 1)
+  i_ini = np.minimum(i.astype(np.int64), nb_nodes - 2)
+  j_ini = np.minimum(j.astype(np.int64), nb_nodes - 2)
+  di = i - i_ini
+  dj = j - j_ini
+  return (
+    (1 - di) * ((1 - dj) * surface[i_ini, j_ini] + dj * surface[i_ini, j_ini+1]) +
+    di * ((1 - dj) * surface[i_ini+1, j_ini] + dj * surface[i_ini+1, j_ini+1]))
@@ -0,0 +1,92 @@
+import sys
+import json
+import time
+
+
+class Probe:
+
+  # ----------------------------------------------------------------
+  # Accumulate the time spent in each phase of the run, along with the number of times each phase was run
+  # ----------------------------------------------------------------
+  def __init__(
+    self,
+    ):
+
+    self.seconds = {}
+    self.counts = {}
+    self.t_last = time.perf_counter()
+
+  # ----------------------------------------------------------------
+  # Start timing, without attributing the elapsed time to any phase
+  # ----------------------------------------------------------------
+  def start(self):
+    self.t_last = time.perf_counter()
+
+  # ----------------------------------------------------------------
+  # Attribute the time elapsed since the previous lap to the given phase
+  # ----------------------------------------------------------------
+  def lap(self, phase):
+    t_now = time.perf_counter()
+    self.seconds[phase] = self.seconds.get(phase, 0) + t_now - self.t_last
+    self.counts[phase] = self.counts.get(phase, 0) + 1
+    self.t_last = t_now
+
+  # ----------------------------------------------------------------
+  # Get the accumulated time and count of each phase
+  # ----------------------------------------------------------------
+  def get_phases(self):
+    return {phase: {'seconds': self.seconds[phase], 'count': self.counts[phase]} for phase in self.seconds}
+
+  # ----------------------------------------------------------------
+  # Print the time spent in each phase, from the most to the least expensive one
+  # ----------------------------------------------------------------
+  def print_summary(self):
+    if not sys.stdout.isatty():
+      print(json.dumps({'msg': 'Summary', 'phases': self.get_phases()}), flush=True)
+      return
+    total = max(sum(self.seconds.values()), 1e-12)
+    print('{:<12} {:>12} {:>12} {:>12} {:>8}'.format('Phase', 'Count', 'Total (s)', 'Mean (us)', 'Share'))
+    for phase in sorted(self.seconds, key=self.seconds.get, reverse=True):
+      print('{:<12} {:>12} {:>12.3f} {:>12.3f} {:>7.1f}%'.format(
+        phase,
+        self.counts[phase],
+        self.seconds[phase],
+        1e6 * self.seconds[phase] / self.counts[phase],
+        100 * self.seconds[phase] / total))
+
+
+class NullProbe:
+
+  # ----------------------------------------------------------------
+  # Same interface as the probe, but nothing is measured, so that the hot loops are not slowed down when disabled
+  # ----------------------------------------------------------------
+  def start(self):
+    pass
+
+  def lap(self, phase):
+    pass
+
+  def get_phases(self):
+    return None
+
+  def print_summary(self):
+    pass
+
+
+# The probe of the current process (disabled unless the instrumentation is switched on)
+probe = NullProbe()
+
+
+# ----------------------------------------------------------------
+# Switch the instrumentation on or off, as specified by the parameters
+# ----------------------------------------------------------------
+def start_instrumentation(p):
+  global probe
+  probe = Probe() if p.INSTRUMENT else NullProbe()
+
+
+# ----------------------------------------------------------------
+# Get the probe of the current process (to be held in a local variable within the hot loops)
+# ----------------------------------------------------------------
+def get_probe():
+  return probe
@@ -1,11 +1,24 @@
-import parameters
-from generate_room import generate_room
-from generate_and_display_hex import generate_and_display_hex
+import os
+import sys
+import ast
+import argparse
 
 
 # Possible options for "INI_PATTERN":
 """
-'empty', 'full', 'random_half', 'poles_2_6_10', 'poles_4_8_12', 'arctic_circle'
+'empty', 'full', 'random_half', 'random_half_fast', 'poles_2_6_10', 'poles_4_8_12', 'arctic_circle', 'limit_shape'
+"""
+
+
+# Possible options for "ENGINE":
+"""
+'flip', 'sweep', 'parallel_sweep', 'cftp', 'heat_bath'
+"""
+
+
+# Possible options for "HEX_RENDERER":
+"""
+'matplotlib', 'raster', 'svg'
 """
 
 
@@ -17,30 +30,216 @@ from generate_and_display_hex import generate_and_display_hex
 """
 
 
-if __name__ == '__main__':
+# Default parameters (used as is when no subcommand is given, and otherwise overridden from the command line)
+DEFAULT_PARAMETERS = dict(
+  N                    = 16,            # Room size
+  GENERATE_ROOM        = True,          # Indicate whether the room shall be generated
+  GENERATE_HEX         = True,          # Indicate whether the hexagon shall be generated (prerequisite: room)
+  INI_PATTERN          = 'random_half', # Indicate how the room shall be initialized, before random flips are applied
+  NB_ITER_FLIP         = 10**3,         # Number of random flips (if negative, will be reset to the total room volume)
+  ENGINE               = 'flip',        # Indicate whether cubes are flipped one at a time, all stacks are swept at once (optionally in parallel), sampled exactly, or stacks resampled one at a time
+  NB_SAMPLES           = 1,             # Number of independent rooms (if larger than one, an ensemble is generated)
+  NB_WORKERS           = 4,             # Number of worker processes used to generate an ensemble of rooms, or to sweep a single room in parallel
+  SHOW_DETAILED_ROOM   = True,          # Indicate whether the room image shall show details about potential flips
+  DARK_BACKGROUND      = False,         # Indicate whether to display the final hex with a dark background
+  COLOR_THEME          = 'rgb',         # Color theme
+  DRAW_FLOOR_AND_WALLS = True,          # Draw the floor and both walls of the room
+  HEX_RENDERER         = 'matplotlib',  # Indicate whether the hex is drawn with matplotlib, directly rasterized (for large rooms), or exported as vectors
+  RASTER_SCALE         = 8,             # Number of pixels per lozenge width, when the hex is directly rasterized
+  USE_RANDOM_SEED      = False,         # Indicate whether a random seed shall be planted for reproducibility
+  VAL_RANDOM_SEED      = 3.14,          # Value of the random seed
+  SHOW_INTERIM         = True,          # Indicate whether intermediate room states shall be printed as PNG images
+  SHOW_FINAL_ROOM      = True,          # Indicate whether the final room state shall be printed as a PNG image (always, if intermediate states are)
+  NB_RENDER_WORKERS    = 0,             # Number of worker processes that render the intermediate images in the background (if zero, none)
+  INSTRUMENT           = False,         # Indicate whether the time spent in each phase of the run shall be measured and summarized
+  INTERIM_LOG_ITERX    = 10**2,         # Indicate the step size at which room iterations shall be printed in the console
+  INTERIM_PRINT_ITERX  = 10**3,         # Indicate the step size at which room iterations shall be saved as images
+  CHECKPOINT_ITERX     = 0,             # Indicate the step size at which the chain state shall be saved (if zero, never)
+  RESUME               = False,         # Indicate whether the chain shall be resumed from the latest checkpoint
+  RECORD_TRAJECTORY    = False,         # Indicate whether each flip shall be recorded, so that the run can be replayed later on
+  KEYFRAME_ITERX       = 10**4,         # Indicate the step size at which the room shall be fully recorded along with the flips
+  CONVERGENCE_ESS      = 0,             # Target effective sample size of the filling and poles, at which the chain stops early (if zero, all flips are applied)
+  CONVERGENCE_ITERX    = 10**2,         # Indicate the step size at which the filling and poles shall be sampled to assess the convergence
+  STATS_ITERX          = 0,             # Indicate the step size at which the room shall be folded into the mean height and frozen maps (if zero, never)
+  TRACK_BOUNDARY       = False,         # Indicate whether the arctic boundary shall be extracted and fitted by an ellipse, at each interim print step
+  RESULTS_PATH         = 'results'      # Folder in which the rooms, the images, and the checkpoints are saved
+  )
+
+
+# ----------------------------------------------------------------
+# Run the experiment: generate the room(s), then the hex (the modules are only imported when needed, so that plotting
+# libraries are not loaded by headless runs)
+# ----------------------------------------------------------------
+def run(p):
 
-  # Set parameters
-  p = parameters.Parameters(
-    N                    = 16,            # Room size
-    GENERATE_ROOM        = True,          # Indicate whether the room shall be generated
-    GENERATE_HEX         = True,          # Indicate whether the hexagon shall be generated (prerequisite: room)
-    INI_PATTERN          = 'random_half', # Indicate how the room shall be initialized, before random flips are applied
-    NB_ITER_FLIP         = 10**3,         # Number of random flips (if negative, will be reset to the total room volume)
-    SHOW_DETAILED_ROOM   = True,          # Indicate whether the room image shall show details about potential flips
-    DARK_BACKGROUND      = False,         # Indicate whether to display the final hex with a dark background
-    COLOR_THEME          = 'rgb',         # Color theme
-    DRAW_FLOOR_AND_WALLS = True,          # Draw the floor and both walls of the room
-    USE_RANDOM_SEED      = False,         # Indicate whether a random seed shall be planted for reproducibility
-    VAL_RANDOM_SEED      = 3.14,          # Value of the random seed
-    SHOW_INTERIM         = True,          # Indicate whether intermediate room states shall be printed as PNG images
-    INTERIM_LOG_ITERX    = 10**2,         # Indicate the step size at which room iterations shall be printed in the console
-    INTERIM_PRINT_ITERX  = 10**3          # Indicate the step size at which room iterations shall be saved as images
-    )
-
-  # Generate room
+  # Generate room(s)
   if p.GENERATE_ROOM:
-    generate_room(p)
+    if p.NB_SAMPLES > 1:
+      from generate_ensemble import generate_ensemble
+      generate_ensemble(p)
+    else:
+      from generate_room import generate_room
+      generate_room(p)
 
   # Generate hex
   if p.GENERATE_HEX:
-    generate_and_display_hex(p)
+    if p.HEX_RENDERER == 'matplotlib':
+      from generate_and_display_hex import generate_and_display_hex
+      generate_and_display_hex(p)
+    elif p.HEX_RENDERER == 'raster':
+      from rasterize_hex import rasterize_hex
+      rasterize_hex(p)
+    elif p.HEX_RENDERER == 'svg':
+      from export_hex_svg import export_hex_svg
+      export_hex_svg(p)
+    else:
+      print('ERROR: Invalid value for parameter "HEX_RENDERER": ' + str(p.HEX_RENDERER))
+      sys.exit()
+
+
+# ----------------------------------------------------------------
+# Set the parameters from the defaults, the overrides of the subcommand, and the options of the command line (the
+# parameters of a saved room, if any, take precedence, as they describe a room that already exists)
+# ----------------------------------------------------------------
+def get_parameters(args, stored=None, **overrides):
+  import parameters
+  kwargs = dict(DEFAULT_PARAMETERS, **overrides)
+  options = {
+    'N': args.size,
+    'INI_PATTERN': args.ini_pattern,
+    'NB_ITER_FLIP': args.nb_flips,
+    'ENGINE': args.engine,
+    'COLOR_THEME': args.color_theme,
+    'HEX_RENDERER': args.renderer,
+    'RESULTS_PATH': args.results}
+  kwargs.update({key: value for key, value in options.items() if value is not None})
+  if args.seed is not None:
+    kwargs['USE_RANDOM_SEED'] = True
+    kwargs['VAL_RANDOM_SEED'] = args.seed
+  for item in args.set:
+    key, _, value = item.partition('=')
+    if key not in DEFAULT_PARAMETERS:
+      print('ERROR: Unknown parameter: ' + str(key))
+      sys.exit()
+    kwargs[key] = parse_value(value)
+  kwargs.update(stored or {})
+  return parameters.Parameters(**kwargs)
+
+
+# ----------------------------------------------------------------
+# Parse the value of a parameter given on the command line (as a Python literal if possible, otherwise as a string)
+# ----------------------------------------------------------------
+def parse_value(value):
+  try:
+    return ast.literal_eval(value)
+  except (ValueError, SyntaxError):
+    return value
+
+
+# ----------------------------------------------------------------
+# Parse the random seed given on the command line (an integer stays an integer, so that it plants the same seed as in
+# the parameters of a script)
+# ----------------------------------------------------------------
+def parse_seed(value):
+  try:
+    return int(value)
+  except ValueError:
+    return float(value)
+
+
+# ----------------------------------------------------------------
+# Get the parameters recorded along with the saved room, so that the hex matches the room (none if there is no room yet,
+# in which case it is generated from the command line)
+# ----------------------------------------------------------------
+def get_stored_parameters(args):
+  import parameters
+  from room_store import load_room_store
+  path = os.path.join(args.results or DEFAULT_PARAMETERS['RESULTS_PATH'], parameters.ROOM_NAME)
+  if not os.path.isfile(path):
+    return None
+  info, _ = load_room_store(path)
+  return {'N': info['N'], 'INI_PATTERN': info['pattern'], 'NB_ITER_FLIP': info['nb_flips']}
+
+
+# ----------------------------------------------------------------
+# Subcommands
+# ----------------------------------------------------------------
+def generate(args):
+  run(get_parameters(
+    args, GENERATE_ROOM=True, GENERATE_HEX=args.hex, NB_SAMPLES=1, NB_WORKERS=args.workers, SHOW_INTERIM=args.interim,
+    SHOW_FINAL_ROOM=args.render))
+
+
+def render(args):
+  run(get_parameters(
+    args, stored=get_stored_parameters(args), GENERATE_ROOM=False, GENERATE_HEX=True, NB_SAMPLES=1, SHOW_INTERIM=False,
+    SHOW_FINAL_ROOM=False))
+
+
+def ensemble(args):
+  run(get_parameters(
+    args, GENERATE_ROOM=True, GENERATE_HEX=False, NB_SAMPLES=args.samples, NB_WORKERS=args.workers, SHOW_INTERIM=False))
+
+
+def bench(args):
+  import benchmark
+  if args.compare is not None:
+    benchmark.compare_benchmarks(*args.compare)
+  else:
+    benchmark.run_default_benchmarks(args.results or DEFAULT_PARAMETERS['RESULTS_PATH'])
+
+
+# ----------------------------------------------------------------
+# Command line: one subcommand per task (without subcommand, the experiment runs with the default parameters)
+# ----------------------------------------------------------------
+def get_parser():
+
+  parser = argparse.ArgumentParser(description='Generate random lozenge tilings of a hexagon, and the arctic circle.')
+  subparsers = parser.add_subparsers(dest='command')
+
+  # Options shared by all the subcommands
+  common = argparse.ArgumentParser(add_help=False)
+  common.add_argument('--results', help='folder of the results (default: {})'.format(DEFAULT_PARAMETERS['RESULTS_PATH']))
+
+  # Options shared by the subcommands that set the parameters of a room
+  room = argparse.ArgumentParser(add_help=False, parents=[common])
+  room.add_argument('-N', '--size', type=int, help='room size')
+  room.add_argument('--ini-pattern', help='room initialization')
+  room.add_argument('--nb-flips', type=int, help='number of random flips (if negative, the total room volume)')
+  room.add_argument('--engine', help='room engine')
+  room.add_argument('--color-theme', help='color theme of the hex')
+  room.add_argument('--renderer', help='hex renderer')
+  room.add_argument('--seed', type=parse_seed, help='random seed (if omitted, the runs are not reproducible)')
+  room.add_argument(
+    '--set', action='append', default=[], metavar='NAME=VALUE', help='set any other parameter (can be repeated)')
+
+  parser_generate = subparsers.add_parser('generate', parents=[room], help='generate a single room, headless by default')
+  parser_generate.add_argument('--workers', type=int, default=DEFAULT_PARAMETERS['NB_WORKERS'], help='number of sweeping workers')
+  parser_generate.add_argument('--interim', action='store_true', help='save the interim room images')
+  parser_generate.add_argument('--render', action='store_true', help='save the image of the final room')
+  parser_generate.add_argument('--hex', action='store_true', help='also render the hex of the room')
+  parser_generate.set_defaults(func=generate)
+
+  parser_render = subparsers.add_parser('render', parents=[room], help='render the hex of the saved room')
+  parser_render.set_defaults(func=render)
+
+  parser_ensemble = subparsers.add_parser('ensemble', parents=[room], help='generate an ensemble of independent rooms')
+  parser_ensemble.add_argument('--samples', type=int, default=8, help='number of rooms')
+  parser_ensemble.add_argument('--workers', type=int, default=DEFAULT_PARAMETERS['NB_WORKERS'], help='number of worker processes')
+  parser_ensemble.set_defaults(func=ensemble)
+
+  parser_bench = subparsers.add_parser('bench', parents=[common], help='run the benchmarks, or compare two reports')
+  parser_bench.add_argument('--compare', nargs=2, metavar=('REFERENCE', 'CANDIDATE'), help='compare two saved reports')
+  parser_bench.set_defaults(func=bench)
+
+  return parser
+
+
+if __name__ == '__main__':
+
+  args = get_parser().parse_args()
+  if args.command is None:
+    import parameters
+    run(parameters.Parameters(**DEFAULT_PARAMETERS))
+  else:
+    args.func(args)
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class MoveSet:
+
+  def __init__(
+    self,
+    lookup,
+    ):
+
+    # Size of the room, needed to convert flat positions back into [x, y] coordinates
+    self.N = lookup.shape[0]
+
+    # Dense array of flat positions (y*N + x) where the move is legal, and the slot of each position (-1 if absent)
+    index_dtype = np.int32 if lookup.size < 2**31 else np.int64
+    self.positions = np.zeros(lookup.size, dtype=index_dtype)
+    self.slots = -np.ones(lookup.size, dtype=index_dtype)
+
+    # Register all the positions that are legal in the lookup map
+    members = np.flatnonzero(lookup)
+    self.size = members.size
+    self.positions[:self.size] = members
+    self.slots[members] = np.arange(self.size)
+
+
+  # ----------------------------------------------------------------
+  # Register the position [x, y] as a legal move, if not already registered
+  # ----------------------------------------------------------------
+  def add(self, x, y):
+    pos = y * self.N + x
+    if self.slots[pos] < 0:
+      self.positions[self.size] = pos
+      self.slots[pos] = self.size
+      self.size += 1
+
+
+  # ----------------------------------------------------------------
+  # Unregister the position [x, y], by moving the last registered position into its slot (swap-remove)
+  # ----------------------------------------------------------------
+  def discard(self, x, y):
+    pos = y * self.N + x
+    slot = self.slots[pos]
+    if slot >= 0:
+      self.size -= 1
+      last = self.positions[self.size]
+      self.positions[slot] = last
+      self.slots[last] = slot
+      self.slots[pos] = -1
+
+
+  # ----------------------------------------------------------------
+  # Mirror the lookup map value at [x, y] into the move set (positions outside the room are ignored)
+  # ----------------------------------------------------------------
+  def sync(self, lookup, x, y):
+    if 0 <= x < self.N and 0 <= y < self.N:
+      if lookup[y, x]:
+        self.add(x, y)
+      else:
+        self.discard(x, y)
+
+
+  # ----------------------------------------------------------------
+  # Get the [x, y] coordinates of the position registered in a given slot
+  # ----------------------------------------------------------------
+  def get_xy(self, slot):
+    pos = int(self.positions[slot])
+    x = pos % self.N
+    y = pos // self.N
+    return x, y
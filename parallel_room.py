@@ -0,0 +1,131 @@
+import sys
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import sweep_room
+from room_state import get_row_bands
+
+
+class ParallelSweeper:
+
+  # ----------------------------------------------------------------
+  # Move the room into shared memory, and start the worker processes, each in charge of one tile of consecutive rows and
+  # starting its random generator from the given state
+  # ----------------------------------------------------------------
+  def __init__(self, room, N, rng_states):
+
+    self.shared = shared_memory.SharedMemory(create=True, size=room.nbytes)
+    self.room = np.ndarray(room.shape, dtype=room.dtype, buffer=self.shared.buf)
+    self.room[:] = room
+
+    # Within a class, the stacks only depend on stacks of the other class: the tiles can be swept at the same time, one
+    # class at a time, as long as all the workers wait for each other before switching to the other class (barrier)
+    tiles = get_tiles(N, len(rng_states))
+    barrier = multiprocessing.Barrier(len(tiles))
+    self.done = multiprocessing.Queue()
+    self.commands = [multiprocessing.Queue() for _ in tiles]
+    self.workers = [
+      multiprocessing.Process(
+        target=sweep_tile,
+        args=(self.shared.name, room.shape, room.dtype, N, tile_idx, y_ini, y_end, rng_state, commands, barrier, self.done),
+        daemon=True)
+      for tile_idx, ((y_ini, y_end), rng_state, commands) in enumerate(zip(tiles, rng_states, self.commands))]
+    for worker in self.workers:
+      worker.start()
+
+  # ----------------------------------------------------------------
+  # Apply a number of sweeps to the shared room, and wait until all the workers are done
+  # ----------------------------------------------------------------
+  def sweep(self, nb_sweeps=1):
+    for commands in self.commands:
+      commands.put(nb_sweeps)
+    self.collect()
+
+  # ----------------------------------------------------------------
+  # Get the states of the random generators of the workers, in the order of the tiles (to be saved in a checkpoint)
+  # ----------------------------------------------------------------
+  def get_rng_states(self):
+    for commands in self.commands:
+      commands.put('state')
+    return self.collect()
+
+  # ----------------------------------------------------------------
+  # Wait until each worker has answered the latest command, and get the answers in the order of the tiles
+  # ----------------------------------------------------------------
+  def collect(self):
+    answers = {}
+    while len(answers) < len(self.workers):
+      try:
+        tile_idx, answer = self.done.get(timeout=1)
+        answers[tile_idx] = answer
+      except queue.Empty:
+        self.check_workers()
+    return [answers[tile_idx] for tile_idx in range(len(self.workers))]
+
+  # ----------------------------------------------------------------
+  # Stop the workers, and get the room back from the shared memory
+  # ----------------------------------------------------------------
+  def close(self):
+    for commands in self.commands:
+      commands.put(None)
+    for worker in self.workers:
+      worker.join()
+    self.check_workers()
+    room = np.array(self.room)
+    del self.room
+    self.shared.close()
+    self.shared.unlink()
+    return room
+
+  # ----------------------------------------------------------------
+  # Stop everything if a worker failed (the other workers would otherwise wait for it forever at the barrier)
+  # ----------------------------------------------------------------
+  def check_workers(self):
+    for worker in self.workers:
+      if worker.exitcode not in [None, 0]:
+        print('ERROR: A sweeping worker failed with exit code: ' + str(worker.exitcode))
+        for other_worker in self.workers:
+          other_worker.terminate()
+        self.shared.unlink()
+        sys.exit()
+
+
+# ----------------------------------------------------------------
+# Split the rows [0, N) into one tile of consecutive rows per worker (there cannot be more tiles than rows)
+# ----------------------------------------------------------------
+def get_tiles(N, nb_workers):
+  bounds = np.linspace(0, N, min(nb_workers, N) + 1).round().astype(np.int64)
+  return [(int(y_ini), int(y_end)) for y_ini, y_end in zip(bounds[:-1], bounds[1:])]
+
+
+# ----------------------------------------------------------------
+# Sweep the tile [y_ini, y_end) of the shared room as many times as commanded, or report the state of the independent
+# random generator of the worker ('state'), until the end of the run is signaled (None)
+# ----------------------------------------------------------------
+def sweep_tile(shared_name, shape, dtype, N, tile_idx, y_ini, y_end, rng_state, commands, barrier, done):
+
+  shared = shared_memory.SharedMemory(name=shared_name)
+  room = np.ndarray(shape, dtype=dtype, buffer=shared.buf)
+  rng = np.random.Generator(np.random.PCG64())
+  rng.bit_generator.state = rng_state
+
+  # The tile is itself swept one band of rows at a time, which bounds the size of the temporary arrays
+  bands = get_row_bands(N, y_ini, y_end)
+  while True:
+    command = commands.get()
+    if command is None:
+      break
+    if command == 'state':
+      done.put((tile_idx, rng.bit_generator.state))
+      continue
+    for _ in range(command):
+      for class_idx in range(2):
+        for band_ini, band_end in bands:
+          mask = sweep_room.get_parity_masks_rows(N, band_ini, band_end)[class_idx]
+          sweep_room.sweep_class_rows(room, N, band_ini, band_end, mask, rng.random((band_end - band_ini, N)))
+        barrier.wait()
+    done.put((tile_idx, None))
+
+  del room
+  shared.close()
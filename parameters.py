@@ -1,4 +1,10 @@
 import os
+import math
+from random_stream import start_random_stream
+
+
+# Name of the saved room, within the results folder
+ROOM_NAME = 'room.bin'
 
 
 class Parameters:
@@ -10,28 +16,64 @@ class Parameters:
     GENERATE_HEX,
     INI_PATTERN,
     NB_ITER_FLIP,
+    ENGINE,
+    NB_SAMPLES,
+    NB_WORKERS,
     SHOW_DETAILED_ROOM,
     DARK_BACKGROUND,
     COLOR_THEME,
     DRAW_FLOOR_AND_WALLS,
+    HEX_RENDERER,
+    RASTER_SCALE,
     USE_RANDOM_SEED,
     VAL_RANDOM_SEED,
     SHOW_INTERIM,
+    SHOW_FINAL_ROOM,
+    NB_RENDER_WORKERS,
+    INSTRUMENT,
     INTERIM_LOG_ITERX,
-    INTERIM_PRINT_ITERX
+    INTERIM_PRINT_ITERX,
+    CHECKPOINT_ITERX,
+    RESUME,
+    RECORD_TRAJECTORY,
+    KEYFRAME_ITERX,
+    CONVERGENCE_ESS,
+    CONVERGENCE_ITERX,
+    STATS_ITERX,
+    TRACK_BOUNDARY,
+    RESULTS_PATH
     ):
 
     self.N = N
     self.GENERATE_HEX = GENERATE_HEX
     self.GENERATE_ROOM = GENERATE_ROOM
     self.INI_PATTERN = INI_PATTERN
+    self.ENGINE = ENGINE
+    self.NB_SAMPLES = NB_SAMPLES
+    self.NB_WORKERS = NB_WORKERS
     self.SHOW_DETAILED_ROOM = SHOW_DETAILED_ROOM
     self.DARK_BACKGROUND = DARK_BACKGROUND
     self.COLOR_THEME = COLOR_THEME
     self.DRAW_FLOOR_AND_WALLS = DRAW_FLOOR_AND_WALLS
+    self.HEX_RENDERER = HEX_RENDERER
+    self.RASTER_SCALE = RASTER_SCALE
+    self.USE_RANDOM_SEED = USE_RANDOM_SEED
+    self.VAL_RANDOM_SEED = VAL_RANDOM_SEED
     self.SHOW_INTERIM = SHOW_INTERIM
+    self.SHOW_FINAL_ROOM = SHOW_FINAL_ROOM
+    self.NB_RENDER_WORKERS = NB_RENDER_WORKERS
+    self.INSTRUMENT = INSTRUMENT
     self.INTERIM_LOG_ITERX = INTERIM_LOG_ITERX
     self.INTERIM_PRINT_ITERX = INTERIM_PRINT_ITERX
+    self.CHECKPOINT_ITERX = CHECKPOINT_ITERX
+    self.RESUME = RESUME
+    self.RECORD_TRAJECTORY = RECORD_TRAJECTORY
+    self.KEYFRAME_ITERX = KEYFRAME_ITERX
+    self.CONVERGENCE_ESS = CONVERGENCE_ESS
+    self.CONVERGENCE_ITERX = CONVERGENCE_ITERX
+    self.STATS_ITERX = STATS_ITERX
+    self.TRACK_BOUNDARY = TRACK_BOUNDARY
+    self.RESULTS_PATH = RESULTS_PATH
 
     # Determine the half number of cubes that can fit in the room
     TOTAL_ROOM_VOLUME = N ** 3
@@ -52,26 +94,46 @@ class Parameters:
     # Determine the number of total iterations
     self.NB_ITER_TOTAL = self.NB_ITER_INIT + self.NB_ITER_FLIP
 
+    # Determine the number of sweeps that amount to the same number of flips, when all N^2 stacks are swept at once
+    self.NB_SWEEP_FLIP = math.ceil(self.NB_ITER_FLIP / N**2)
+
     # Number of leading zeroes to display iterations during room population
     self.ZFILL = len(str(self.NB_ITER_TOTAL))
 
-    # Plant the random seed for reproducibility
-    if USE_RANDOM_SEED:
-      random.seed(VAL_RANDOM_SEED)
+    # Plant the random seed for reproducibility (the seed is also recorded along with the saved rooms)
+    self.SEED = VAL_RANDOM_SEED if USE_RANDOM_SEED else None
+    start_random_stream(self.SEED)
 
-    # Create the folder to print and save the results, and delete all pre-existing PNG images of room iterations
-    self.RESULTS_PATH = 'results'
-    if not os.path.exists(self.RESULTS_PATH):
-      os.makedirs(self.RESULTS_PATH)
-    list_of_pngs = os.listdir(self.RESULTS_PATH)
-    for item in list_of_pngs:
-      if item.startswith('room_iterx_') and item.endswith('.png'):
-        os.remove(os.path.join(self.RESULTS_PATH, item))
+    # Create the folder to print and save the results
+    os.makedirs(self.RESULTS_PATH, exist_ok=True)
 
     # If the room does not exist, it will be generated
-    self.ROOM_NAME = 'room.pkl'
+    self.ROOM_NAME = ROOM_NAME
     self.GENERATE_ROOM = GENERATE_ROOM or not os.path.isfile(os.path.join(self.RESULTS_PATH, self.ROOM_NAME))
 
+    # Delete all pre-existing PNG images of room iterations, only if they are about to be replaced by new ones (so that
+    # short headless jobs do not scan the folder)
+    if self.GENERATE_ROOM and self.SHOW_INTERIM:
+      for item in os.listdir(self.RESULTS_PATH):
+        if item.startswith('room_iterx_') and item.endswith('.png'):
+          os.remove(os.path.join(self.RESULTS_PATH, item))
+
+    # The complete chain state is periodically saved, so that an interrupted or finished run can be resumed
+    self.CHECKPOINT_NAME = 'checkpoint.pkl'
+
+    # Each flip can be recorded, so that the room can be rebuilt at any iteration once the run is over
+    self.TRAJECTORY_NAME = 'trajectory.bin'
+
+    # An ensemble of rooms is saved as a single batch, and the hex is only drawn from a single room
+    self.ENSEMBLE_NAME = 'rooms.bin'
+    if self.NB_SAMPLES > 1:
+      self.GENERATE_ROOM = GENERATE_ROOM
+      self.GENERATE_HEX = False
+
+    # The mean height and the frozen probability of each stack are accumulated over the samples of an ensemble, or over
+    # the thinned iterations of a chain
+    self.STATS_NAME = 'stats.bin'
+
     # Determine the filename that will be used to save the final hexagon image
     self.FILENAME = 'Hex.Size={}.Init={}.NbFlips={}.FloorsAndWall={}.Color={}'.format(
       self.N, self.INI_PATTERN, self.NB_ITER_FLIP, self.DRAW_FLOOR_AND_WALLS, self.COLOR_THEME)
@@ -0,0 +1,93 @@
+import numpy as np
+
+
+# Number of uniform numbers drawn at once, and then served one at a time to the chain
+BLOCK_SIZE = 2**16
+
+
+class RandomStream:
+
+  # ----------------------------------------------------------------
+  # A single random generator, which serves pre-drawn blocks of uniform numbers, and from which independent streams
+  # can be spawned
+  # ----------------------------------------------------------------
+  def __init__(
+    self,
+    seed_sequence,
+    ):
+
+    self.seed_sequence = seed_sequence
+    self.generator = np.random.Generator(np.random.PCG64(seed_sequence))
+    self.block = []
+    self.idx = 0
+
+  # ----------------------------------------------------------------
+  # Get one uniform number in [0, 1), from the current block (draw the next block once the current one is exhausted)
+  # ----------------------------------------------------------------
+  def uniform(self):
+    if self.idx == len(self.block):
+      self.block = self.generator.random(BLOCK_SIZE).tolist()
+      self.idx = 0
+    u = self.block[self.idx]
+    self.idx += 1
+    return u
+
+  # ----------------------------------------------------------------
+  # Get an array of uniform numbers in [0, 1)
+  # ----------------------------------------------------------------
+  def random(self, shape):
+    return self.generator.random(shape)
+
+  # ----------------------------------------------------------------
+  # Get a random subset of the given candidates
+  # ----------------------------------------------------------------
+  def choice(self, candidates, nb_candidates):
+    return self.generator.choice(candidates, nb_candidates, replace=False)
+
+  # ----------------------------------------------------------------
+  # Get the seeds of independent child streams (the n-th child is always the same, given the seed of the parent)
+  # ----------------------------------------------------------------
+  def spawn_seeds(self, nb_children):
+    return self.seed_sequence.spawn(nb_children)
+
+  # ----------------------------------------------------------------
+  # Get independent child streams
+  # ----------------------------------------------------------------
+  def spawn(self, nb_children):
+    return [RandomStream(seed_sequence) for seed_sequence in self.spawn_seeds(nb_children)]
+
+
+# ----------------------------------------------------------------
+# Convert the value of the random seed into the entropy of a seed sequence (None: fresh entropy from the system)
+# ----------------------------------------------------------------
+def get_seed_entropy(seed):
+  if seed is None or isinstance(seed, (int, np.integer)):
+    return seed
+  # (a non-integer seed, such as 3.14, is identified by the bits of its floating-point representation)
+  return int(np.array(seed, dtype=np.float64).view(np.uint64))
+
+
+# The random stream of the current process
+random_stream = RandomStream(np.random.SeedSequence())
+
+
+# ----------------------------------------------------------------
+# Start the random stream of the current process from the given seed
+# ----------------------------------------------------------------
+def start_random_stream(seed=None):
+  set_random_stream(RandomStream(np.random.SeedSequence(get_seed_entropy(seed))))
+
+
+# ----------------------------------------------------------------
+# Replace the random stream of the current process (e.g., by a spawned stream, or by a stream restored from a checkpoint)
+# ----------------------------------------------------------------
+def set_random_stream(stream):
+  global random_stream
+  random_stream = stream
+
+
+# ----------------------------------------------------------------
+# Get the random stream of the current process (to be held in a local variable within the hot loops)
+# ----------------------------------------------------------------
+def get_random_stream():
+  return random_stream
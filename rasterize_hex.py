@@ -0,0 +1,157 @@
+import os
+import math
+import time
+import zlib
+import struct
+import numpy as np
+from utils import print_iter_msg
+from room_store import load_room
+from hex_geometry import COLOR_RGB
+from hex_geometry import get_face_levels
+from hex_geometry import get_color_theme
+
+
+# Types of the unit triangles that tile the hexagon, each face of a cube being made of two triangles
+FACE_BACKGROUND = 0
+FACE_TOP = 1
+FACE_LFT = 2
+FACE_RGT = 3
+
+# Number of pixels rasterized at once, which bounds the memory footprint regardless of the image size
+NB_PIXELS_PER_STRIP = 2**20
+
+
+# ----------------------------------------------------------------
+# Generate the hex as a PNG image, by computing the face type at each pixel (without matplotlib)
+# ----------------------------------------------------------------
+def rasterize_hex(p):
+
+  # Log the progress
+  t_ini = time.time()
+  print_iter_msg('Hex', 0, 1, t_ini, t_ini)
+
+  # Load the previously generated room
+  room = load_room(os.path.join(p.RESULTS_PATH, p.ROOM_NAME)).astype(np.int32)
+
+  # Get the specified color theme, indexed by face type (the last color being the one of the edges)
+  color_edges, color_top, color_lft, color_rgt = get_color_theme(p.COLOR_THEME)
+  color_background = 'black' if p.DARK_BACKGROUND else 'white'
+  palette = np.array(
+    [COLOR_RGB[color] for color in [color_background, color_top, color_lft, color_rgt, color_edges]], dtype=np.uint8)
+
+  # Get the type of each unit triangle of the hexagon
+  triangles = get_triangle_faces(room, p.N, p.DRAW_FLOOR_AND_WALLS)
+
+  # The hexagon spans 2N units horizontally, and 4N vertical shifts between two neighbor lozenges vertically
+  dj = math.tan(math.pi / 6)
+  width = math.ceil(2 * p.N * p.RASTER_SCALE)
+  height = math.ceil(4 * p.N * dj * p.RASTER_SCALE)
+  nb_rows_per_strip = max(1, NB_PIXELS_PER_STRIP // width)
+  nb_strips = math.ceil(height / nb_rows_per_strip)
+  cols = np.arange(width)
+
+  # Rasterize the image strip by strip, and stream each strip into the PNG file as soon as it is compressed
+  with open(os.path.join(p.RESULTS_PATH, p.FILENAME + '.png'), 'wb') as fid:
+    write_png_header(fid, width, height)
+    compressor = zlib.compressobj()
+
+    for strip in range(nb_strips):
+      row_ini = strip * nb_rows_per_strip
+      row_end = min(row_ini + nb_rows_per_strip, height)
+
+      # One extra row is rasterized, so that each pixel can be compared with the pixel right below it
+      types, faces = get_pixel_faces(triangles, p.N, np.arange(row_ini, row_end + 1), cols, p.RASTER_SCALE, dj)
+
+      # Edges are the pixels that do not belong to the same face as their right or lower neighbor
+      is_edge = faces[:-1, :] != faces[1:, :]
+      is_edge[:, :-1] |= faces[:-1, :-1] != faces[:-1, 1:]
+      types = types[:-1, :]
+      types[is_edge] = len(palette) - 1
+
+      # Each PNG row starts with the filter type (0: none)
+      pixels = palette[types].reshape(row_end - row_ini, 3 * width)
+      scanlines = np.concatenate([np.zeros((row_end - row_ini, 1), dtype=np.uint8), pixels], axis=1)
+      write_png_chunk(fid, b'IDAT', compressor.compress(scanlines.tobytes()))
+
+      # Log the progress
+      t_now = time.time()
+      print_iter_msg('Hex', strip+1, nb_strips, t_now, t_ini)
+
+    write_png_chunk(fid, b'IDAT', compressor.flush())
+    write_png_chunk(fid, b'IEND', b'')
+
+
+# ----------------------------------------------------------------
+# Get the type of each unit triangle of the hexagon (shape: [2N, 2N, 2])
+# ----------------------------------------------------------------
+def get_triangle_faces(room, N, with_floor_and_walls):
+
+  # Along the viewing direction, the point (x, y, z) projects onto (p, q) = (x - z, y - z), with p and q in [-N, N]
+  # Each unit cell (floor(p), floor(q)) is split by its diagonal into two triangles: p - floor(p) >= q - floor(q)
+  # (half 0), and conversely (half 1), and the cells are offset by N to be used as indices
+  triangles = np.zeros((2*N, 2*N, 2), dtype=np.int8)
+  levels_top, levels_lft, levels_rgt = get_face_levels(room, N, with_floor_and_walls)
+
+  # The top face of the stack (x, y) at height h covers the cell (x - h, y - h)
+  x, y, level = levels_top
+  triangles[x - level + N, y - level + N, :] = FACE_TOP
+
+  # The left face of the stack (x, y) at level k covers the half 0 of the cell (x - k, y - k) and the half 1 below it
+  x, y, level = levels_lft
+  triangles[x - level + N, y - level + N, 0] = FACE_LFT
+  triangles[x - level + N, y - level + N - 1, 1] = FACE_LFT
+
+  # The right face of the stack (x, y) at level k covers the half 1 of the cell (x - k, y - k) and the half 0 beside it
+  x, y, level = levels_rgt
+  triangles[x - level + N, y - level + N, 1] = FACE_RGT
+  triangles[x - level + N - 1, y - level + N, 0] = FACE_RGT
+
+  return triangles
+
+
+# ----------------------------------------------------------------
+# Get the face type and a face identifier for each pixel of a strip of rows
+# ----------------------------------------------------------------
+def get_pixel_faces(triangles, N, rows, cols, scale, dj):
+
+  # Coordinates of the pixel centers, horizontally in [-N, N], and vertically in units of vertical shifts in [-2N, 2N]
+  i = -N + (cols[np.newaxis, :] + 0.5) / scale
+  j = 2*N - (rows[:, np.newaxis] + 0.5) / (scale * dj)
+
+  # Project back onto the cells and the triangles
+  cell_p = (-i - j) / 2
+  cell_q = (i - j) / 2
+  cell_p_floor = np.floor(cell_p).astype(np.int64)
+  cell_q_floor = np.floor(cell_q).astype(np.int64)
+  half = (cell_q - cell_q_floor > cell_p - cell_p_floor).astype(np.int64)
+
+  # Look up the face type of the triangles that lie within the hexagon
+  is_inside = (cell_p_floor >= -N) & (cell_p_floor < N) & (cell_q_floor >= -N) & (cell_q_floor < N)
+  idx = ((cell_p_floor + N) * 2*N + (cell_q_floor + N)) * 2 + half
+  types = np.where(is_inside, triangles.ravel()[np.where(is_inside, idx, 0)], FACE_BACKGROUND)
+
+  # Both triangles of a face share an identifier, namely the cell of its half 0 for side faces, along with its type
+  anchor_p = cell_p_floor + ((types == FACE_RGT) & (half == 0))
+  anchor_q = cell_q_floor + ((types == FACE_LFT) & (half == 1))
+  faces = ((anchor_p + N + 1) * (2*N + 2) + (anchor_q + N + 1)) * 4 + types
+  faces[types == FACE_BACKGROUND] = 0
+
+  return types, faces
+
+
+# ----------------------------------------------------------------
+# Write the PNG signature and the header of an 8-bit RGB image
+# ----------------------------------------------------------------
+def write_png_header(fid, width, height):
+  fid.write(b'\x89PNG\r\n\x1a\n')
+  write_png_chunk(fid, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+
+# ----------------------------------------------------------------
+# Write a PNG chunk: length, type, data, and checksum
+# ----------------------------------------------------------------
+def write_png_chunk(fid, chunk_type, data):
+  fid.write(struct.pack('>I', len(data)))
+  fid.write(chunk_type)
+  fid.write(data)
+  fid.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
@@ -0,0 +1,77 @@
+import sys
+import copy
+import queue
+import multiprocessing
+import numpy as np
+from room_view import RoomView
+
+
+# Number of pending frames per worker process, beyond which the chain waits for the rendering to catch up
+NB_PENDING_FRAMES_PER_WORKER = 2
+
+
+class RenderPipeline:
+
+  # ----------------------------------------------------------------
+  # Start the worker processes, which render the frames from a bounded queue
+  # ----------------------------------------------------------------
+  def __init__(self, p):
+    self.frames = multiprocessing.Queue(maxsize=NB_PENDING_FRAMES_PER_WORKER * p.NB_RENDER_WORKERS)
+    self.workers = [
+      multiprocessing.Process(target=render_frames, args=(p, self.frames), daemon=True)
+      for _ in range(p.NB_RENDER_WORKERS)]
+    for worker in self.workers:
+      worker.start()
+
+  # ----------------------------------------------------------------
+  # Hand a snapshot of the room over to the workers (if the queue is full, wait until a frame has been taken)
+  # ----------------------------------------------------------------
+  def submit(self, room, lookup_add, lookup_rmv, t_now, t_ini, f, iterx=0, x=0, y=0, flip_sign=0):
+    # (the room is copied, as the chain keeps altering it while the frame is pending)
+    frame = (np.array(room), np.array(lookup_add), np.array(lookup_rmv), t_now, t_ini, copy.copy(f), iterx, x, y, flip_sign)
+    self.put(frame)
+
+  # ----------------------------------------------------------------
+  # Wait until all the pending frames have been rendered, and stop the workers
+  # ----------------------------------------------------------------
+  def close(self):
+    for _ in self.workers:
+      self.put(None)
+    for worker in self.workers:
+      worker.join()
+    self.check_workers()
+
+  # ----------------------------------------------------------------
+  # Put an item into the queue, while making sure that the workers are still alive to take it
+  # ----------------------------------------------------------------
+  def put(self, item):
+    while True:
+      try:
+        self.frames.put(item, timeout=1)
+        return
+      except queue.Full:
+        self.check_workers()
+
+  # ----------------------------------------------------------------
+  # Stop everything if a worker failed
+  # ----------------------------------------------------------------
+  def check_workers(self):
+    for worker in self.workers:
+      if worker.exitcode not in [None, 0]:
+        print('ERROR: A rendering worker failed with exit code: ' + str(worker.exitcode))
+        for other_worker in self.workers:
+          other_worker.terminate()
+        sys.exit()
+
+
+# ----------------------------------------------------------------
+# Render the frames of the queue until the end of the run is signaled (None)
+# ----------------------------------------------------------------
+def render_frames(p, frames):
+  room_view = RoomView(p)
+  while True:
+    frame = frames.get()
+    if frame is None:
+      break
+    room_view.render(*frame)
+  room_view.close()
@@ -0,0 +1,145 @@
+import sys
+import numpy as np
+
+
+# Number of stacks processed at once by the routines that walk the room one band of rows at a time, which bounds the
+# size of their temporary arrays regardless of the room size
+NB_CELLS_PER_BAND = 2**20
+
+
+# ----------------------------------------------------------------
+# Get the smallest signed integer type that can store stack heights between 0 and N (signed, so that differences and
+# decrements never wrap around)
+# ----------------------------------------------------------------
+def get_room_dtype(N):
+  for dtype in [np.int8, np.int16, np.int32]:
+    if N <= np.iinfo(dtype).max:
+      return np.dtype(dtype)
+  print('ERROR: Rooms larger than {} are not supported: {}'.format(np.iinfo(np.int32).max, N))
+  sys.exit()
+
+
+# ----------------------------------------------------------------
+# Split the rows [0, N) (or the rows [y_ini, y_end) of a tile) into consecutive bands, of a bounded number of stacks
+# ----------------------------------------------------------------
+def get_row_bands(N, y_ini=0, y_end=None):
+  y_end = N if y_end is None else y_end
+  nb_rows_per_band = max(1, NB_CELLS_PER_BAND // max(N, 1))
+  return [(y, min(y + nb_rows_per_band, y_end)) for y in range(y_ini, y_end, nb_rows_per_band)]
+
+
+# ----------------------------------------------------------------
+# Compute the Boolean lookup maps that indicate where cubes could be added and removed, for the rows [y_ini, y_end)
+# (walls count as full stacks, and the void as empty stacks)
+# ----------------------------------------------------------------
+def compute_lookups_rows(room, N, y_ini, y_end):
+
+  rows = room[y_ini:y_end]
+
+  # A cube can be added if self is strictly lower than the previous stacks along x and y
+  lookup_add = np.empty(rows.shape, dtype=bool)
+  lookup_add[0] = rows[0] < (room[y_ini-1] if y_ini > 0 else N)
+  np.less(rows[1:], rows[:-1], out=lookup_add[1:])
+  lookup_add[:, 1:] &= rows[:, 1:] < rows[:, :-1]
+  lookup_add[:, 0] &= rows[:, 0] < N
+
+  # A cube can be removed if self is strictly higher than the next stacks along x and y
+  lookup_rmv = np.empty(rows.shape, dtype=bool)
+  lookup_rmv[-1] = rows[-1] > (room[y_end] if y_end < N else 0)
+  np.greater(rows[:-1], rows[1:], out=lookup_rmv[:-1])
+  lookup_rmv[:, :-1] &= rows[:, :-1] > rows[:, 1:]
+  lookup_rmv[:, -1] &= rows[:, -1] > 0
+
+  return lookup_add, lookup_rmv
+
+
+class PackedBoolMap:
+
+  # ----------------------------------------------------------------
+  # Boolean map of N x N cells, stored as one bit per cell (each row is packed along x)
+  # ----------------------------------------------------------------
+  def __init__(
+    self,
+    N,
+    ):
+
+    self.N = N
+    self.shape = (N, N)
+    self.size = N * N
+    self.bits = np.zeros((N, (N + 7) // 8), dtype=np.uint8)
+
+  # ----------------------------------------------------------------
+  # Get the cell [y, x]
+  # ----------------------------------------------------------------
+  def __getitem__(self, yx):
+    y, x = yx
+    return bool((self.bits[y, x >> 3] >> (x & 7)) & 1)
+
+  # ----------------------------------------------------------------
+  # Set the cell [y, x]
+  # ----------------------------------------------------------------
+  def __setitem__(self, yx, value):
+    y, x = yx
+    if value:
+      self.bits[y, x >> 3] |= 1 << (x & 7)
+    else:
+      self.bits[y, x >> 3] &= 0xFF ^ (1 << (x & 7))
+
+  # ----------------------------------------------------------------
+  # Unpack the rows [y_ini, y_end) into a Boolean array
+  # ----------------------------------------------------------------
+  def get_rows(self, y_ini, y_end):
+    return np.unpackbits(self.bits[y_ini:y_end], axis=1, count=self.N, bitorder='little').view(bool)
+
+  # ----------------------------------------------------------------
+  # Pack a Boolean array into the rows starting at y_ini
+  # ----------------------------------------------------------------
+  def set_rows(self, y_ini, rows):
+    self.bits[y_ini:y_ini + rows.shape[0]] = np.packbits(rows, axis=1, bitorder='little')
+
+  # ----------------------------------------------------------------
+  # Count the cells that are set
+  # ----------------------------------------------------------------
+  def count(self):
+    return int(np.unpackbits(self.bits, bitorder='little').sum(dtype=np.int64)) if self.N % 8 == 0 else sum(
+      int(np.count_nonzero(self.get_rows(y_ini, y_end))) for y_ini, y_end in get_row_bands(self.N))
+
+  # ----------------------------------------------------------------
+  # Unpack the whole map (only meant for small rooms, e.g., to be displayed)
+  # ----------------------------------------------------------------
+  def __array__(self, dtype=None, copy=None):
+    array = self.get_rows(0, self.N)
+    return array if dtype is None else array.astype(dtype)
+
+
+class RoomState:
+
+  # ----------------------------------------------------------------
+  # Compact state of a room: the stack heights with the narrowest type, and bit-packed lookup maps
+  # ----------------------------------------------------------------
+  def __init__(
+    self,
+    room,
+    N,
+    ):
+
+    self.N = N
+    self.room = room if room.dtype == get_room_dtype(N) else room.astype(get_room_dtype(N))
+    self.lookup_add = PackedBoolMap(N)
+    self.lookup_rmv = PackedBoolMap(N)
+    self.update_lookups()
+
+  # ----------------------------------------------------------------
+  # Compute the lookup maps from the room, one band of rows at a time
+  # ----------------------------------------------------------------
+  def update_lookups(self):
+    for y_ini, y_end in get_row_bands(self.N):
+      lookup_add, lookup_rmv = compute_lookups_rows(self.room, self.N, y_ini, y_end)
+      self.lookup_add.set_rows(y_ini, lookup_add)
+      self.lookup_rmv.set_rows(y_ini, lookup_rmv)
+
+  # ----------------------------------------------------------------
+  # Memory footprint, in bytes
+  # ----------------------------------------------------------------
+  def nbytes(self):
+    return self.room.nbytes + self.lookup_add.bits.nbytes + self.lookup_rmv.bits.nbytes
@@ -0,0 +1,119 @@
+import sys
+import numpy as np
+
+
+# Fixed-size header, followed by the heights of all rooms stored contiguously (room-major, then row-major)
+MAGIC = b'ARCTICRM'
+VERSION = 2
+HEADER_SIZE = 128
+SEED_SIZE = 32
+HEADER_DTYPE = np.dtype([
+  ('magic', 'S8'),
+  ('version', '<u4'),
+  ('N', '<u4'),
+  ('nb_rooms', '<u8'),
+  ('nb_flips', '<i8'),
+  ('seed', 'S{}'.format(SEED_SIZE)),
+  ('height_dtype', 'S8'),
+  ('pattern', 'S32'),
+  ('padding', 'V{}'.format(HEADER_SIZE - 72 - SEED_SIZE))])
+
+
+# ----------------------------------------------------------------
+# Get the smallest unsigned integer type that can store stack heights between 0 and N
+# ----------------------------------------------------------------
+def get_height_dtype(N):
+  if N <= np.iinfo(np.uint8).max:
+    return np.dtype('<u1')
+  elif N <= np.iinfo(np.uint16).max:
+    return np.dtype('<u2')
+  else:
+    print('ERROR: Rooms larger than {} cannot be stored: {}'.format(np.iinfo(np.uint16).max, N))
+    sys.exit()
+
+
+# ----------------------------------------------------------------
+# Encode the random seed as text, so that integer and floating-point seeds are both recorded without loss (empty if there
+# is no seed)
+# ----------------------------------------------------------------
+def encode_seed(seed):
+  text = b'' if seed is None else str(seed).encode()
+  if len(text) > SEED_SIZE:
+    print('ERROR: The random seed cannot be recorded in more than {} characters: {}'.format(SEED_SIZE, seed))
+    sys.exit()
+  return text
+
+
+# ----------------------------------------------------------------
+# Decode the random seed (an integer seed stays an integer, as it plants a different stream than the same float)
+# ----------------------------------------------------------------
+def decode_seed(text):
+  if not text:
+    return None
+  try:
+    return int(text)
+  except ValueError:
+    return float(text)
+
+
+# ----------------------------------------------------------------
+# Create a store for a batch of rooms, and get the writable memory-mapped array of their heights
+# ----------------------------------------------------------------
+def create_room_store(path, nb_rooms, N, INI_PATTERN, nb_flips, seed=None):
+
+  height_dtype = get_height_dtype(N)
+
+  # Write the header
+  header = np.zeros(1, dtype=HEADER_DTYPE)
+  header['magic'] = MAGIC
+  header['version'] = VERSION
+  header['N'] = N
+  header['nb_rooms'] = nb_rooms
+  header['nb_flips'] = nb_flips
+  header['seed'] = encode_seed(seed)
+  header['height_dtype'] = height_dtype.str.encode()
+  header['pattern'] = INI_PATTERN.encode()
+  with open(path, 'wb') as fid:
+    header.tofile(fid)
+
+  # Map the heights, which are filled with zeros until they are written
+  return np.memmap(path, dtype=height_dtype, mode='r+', offset=HEADER_SIZE, shape=(nb_rooms, N, N))
+
+
+# ----------------------------------------------------------------
+# Save a single room
+# ----------------------------------------------------------------
+def save_room(path, room, N, INI_PATTERN, nb_flips, seed=None):
+  rooms = create_room_store(path, 1, N, INI_PATTERN, nb_flips, seed)
+  rooms[0] = room
+  rooms.flush()
+
+
+# ----------------------------------------------------------------
+# Load a batch of rooms lazily: the header as a dictionary, and the read-only memory-mapped array of their heights
+# ----------------------------------------------------------------
+def load_room_store(path):
+
+  header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+  if header['magic'] != MAGIC or header['version'] != VERSION:
+    print('ERROR: Not a room store (or unsupported version): ' + str(path))
+    sys.exit()
+
+  info = {
+    'N': int(header['N']),
+    'nb_rooms': int(header['nb_rooms']),
+    'nb_flips': int(header['nb_flips']),
+    'seed': decode_seed(header['seed']),
+    'pattern': header['pattern'].decode()}
+  rooms = np.memmap(
+    path, dtype=np.dtype(header['height_dtype'].decode()), mode='r', offset=HEADER_SIZE,
+    shape=(info['nb_rooms'], info['N'], info['N']))
+  return info, rooms
+
+
+# ----------------------------------------------------------------
+# Load a single room (the first one of the store)
+# ----------------------------------------------------------------
+def load_room(path):
+  _, rooms = load_room_store(path)
+  return rooms[0]
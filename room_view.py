@@ -0,0 +1,209 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+from utils import stopwatch
+
+
+class RoomView:
+
+  # ----------------------------------------------------------------
+  # Create the figure and all its artists once, to be updated for each subsequent frame
+  # ----------------------------------------------------------------
+  def __init__(self, p):
+
+    self.p = p
+
+    # Colors to indicate where cubes can potentially be added and/or removed
+    self.color_neutral = 'white'
+    self.color_add = 'orchid'
+    self.color_rmv = 'darkorange'
+
+    # Colorbar range
+    self.vmin = 0
+    self.vmax = p.N
+
+    # Panel positions: room, surface, addable cubes, removable cubes, and (if detailed) the annotated rooms
+    if p.SHOW_DETAILED_ROOM:
+      nb_rows, nb_cols = 2, 3
+      panels = [1, 4, 2, 3, 5, 6]
+    else:
+      nb_rows, nb_cols = 2, 2
+      panels = [1, 2, 3, 4]
+
+    # Create figure
+    self.fig = plt.figure()
+    empty_room = np.zeros((p.N, p.N))
+
+    # Panel
+    axx = self.fig.add_subplot(nb_rows, nb_cols, panels[0])
+    self.im_room = axx.imshow(empty_room, vmin=self.vmin, vmax=self.vmax)
+    axx.set_xlabel('x-axis')
+    axx.set_ylabel('y-axis')
+    self.title_room = axx.set_title('')
+    nice_colorbar(self.im_room, axx)
+    if p.SHOW_DETAILED_ROOM:
+      self.marks_room = RoomMarks(axx, p.N)
+
+    # Panel (a surface cannot be updated in place, hence it is replaced for each frame, but not its axes)
+    self.axx_surface = self.fig.add_subplot(nb_rows, nb_cols, panels[1], projection='3d')
+    self.axx_surface.set_xlabel('x-axis')
+    self.axx_surface.set_ylabel('y-axis')
+    self.axx_surface.set_zlabel('Number of stacked cubes')
+    self.axx_surface.set_xlim(0, max(1, p.N-1))
+    self.axx_surface.set_ylim(0, max(1, p.N-1))
+    self.axx_surface.set_zlim(0, p.N)
+    self.axx_surface.azim = 45
+    self.X, self.Y = np.meshgrid(np.arange(p.N), np.arange(p.N))
+    self.surface = None
+
+    # Panel
+    axx = self.fig.add_subplot(nb_rows, nb_cols, panels[2])
+    self.im_add = axx.imshow(empty_room, cmap='gray', vmin=0, vmax=1)
+    axx.set_xlabel('x-axis')
+    axx.set_ylabel('y-axis')
+    axx.set_title('Cubes that can be added')
+
+    # Panel
+    axx = self.fig.add_subplot(nb_rows, nb_cols, panels[3])
+    self.im_rmv = axx.imshow(empty_room, cmap='gray', vmin=0, vmax=1)
+    axx.set_xlabel('x-axis')
+    axx.set_ylabel('y-axis')
+    axx.set_title('Cubes that can be removed')
+
+    if p.SHOW_DETAILED_ROOM:
+
+      # Panel
+      axx = self.fig.add_subplot(nb_rows, nb_cols, panels[4])
+      self.im_potential_add = axx.imshow(empty_room, vmin=0, vmax=p.N)
+      axx.set_xlabel('x-axis')
+      axx.set_ylabel('y-axis')
+      axx.set_title(r'Cubes that can be added ($+$)')
+      self.marks_potential_add = RoomMarks(axx, p.N)
+
+      # Panel
+      axx = self.fig.add_subplot(nb_rows, nb_cols, panels[5])
+      self.im_potential_rmv = axx.imshow(empty_room, vmin=0, vmax=p.N)
+      axx.set_xlabel('x-axis')
+      axx.set_ylabel('y-axis')
+      axx.set_title(r'Cubes that can be removed ($-$)')
+      self.marks_potential_rmv = RoomMarks(axx, p.N)
+
+    # Figure size
+    if p.SHOW_DETAILED_ROOM:
+      self.fig.set_size_inches(40, 30, forward = True)
+    else:
+      self.fig.set_size_inches(30, 30, forward = True)
+
+    # The tight bounding box is computed when saving the first frame, and then reused as the layout does not change
+    self.bbox = None
+
+  # ----------------------------------------------------------------
+  # Update the artists with the current room, and save the frame
+  # ----------------------------------------------------------------
+  def render(self, room, lookup_add, lookup_rmv, t_now, t_ini, f, iterx=0, x=0, y=0, flip_sign=0):
+
+    p = self.p
+
+    # Determine if the current iteration belongs to the "initialization" phase or to the "flip" phase
+    if p.INI_PATTERN == 'random_half':
+      iterx_init = min(iterx, p.NB_ITER_INIT)
+      iterx_flip = iterx - iterx_init
+      iter_msg = 'Iteration: {}/{} (Init: {}/{}, Flip: {}/{})'.format(
+        iterx, p.NB_ITER_TOTAL, iterx_init, p.NB_ITER_INIT, iterx_flip, p.NB_ITER_FLIP)
+    else:
+      iter_msg = 'Iteration: {}/{}'.format(iterx, p.NB_ITER_TOTAL)
+
+    # Prepare text information to be displayed as the figure title
+    room_msg = r'Room ({} $\times$ {} $\times$ {})'.format(p.N, p.N, p.N)
+    time_msg = 'Elapsed time: {}'.format(stopwatch(t_now, t_ini))
+    monotony_msg = 'Monotony: {}'.format(f.monotony)
+    filling_msg = 'Filling: {}'.format(f.filling)
+    poles_msg = 'Poles: (2, 8)=({}, {}), (4, 10)=({}, {}), (6, 12)=({}, {})'.format(
+      f.x_empty, f.x_full, f.y_empty, f.y_full, f.z_empty, f.z_full)
+    self.title_room.set_text(
+      room_msg + ' | ' + time_msg + '\n' + iter_msg + '\n' + monotony_msg + ' | ' + filling_msg + ' | ' + poles_msg)
+
+    # Update the image data (bit-packed lookup maps are unpacked first)
+    lookup_add = np.asarray(lookup_add)
+    lookup_rmv = np.asarray(lookup_rmv)
+    self.im_room.set_data(room)
+    self.im_add.set_data(lookup_add)
+    self.im_rmv.set_data(lookup_rmv)
+
+    # Replace the surface
+    if self.surface is not None:
+      self.surface.remove()
+    self.surface = self.axx_surface.plot_surface(
+      self.X, self.Y, room, linewidth=1, antialiased=True, edgecolor='white', rstride=1, cstride=1, vmin=self.vmin,
+      vmax=self.vmax, cmap='viridis')
+
+    # Update the annotations (on purpose, if "flip_sign == 0", no circle shall be drawn)
+    if p.SHOW_DETAILED_ROOM:
+      self.im_potential_add.set_data(room)
+      self.im_potential_rmv.set_data(room)
+      heights = room.astype(str)
+      neutral = np.full(room.shape, self.color_neutral)
+
+      # Height of each stack of cubes
+      circle_color = self.color_add if flip_sign > 0 else self.color_rmv
+      self.marks_room.update(heights, neutral, flip_sign != 0, x, y, circle_color)
+
+      # Locations where cubes can potentially be added
+      labels = np.where(lookup_add, np.char.add(heights, r'$+$'), heights)
+      colors = np.where(lookup_add, self.color_add, self.color_neutral)
+      circle_color = self.color_add if flip_sign > 0 else self.color_neutral
+      self.marks_potential_add.update(labels, colors, flip_sign != 0, x, y, circle_color)
+
+      # Locations where cubes can potentially be removed
+      labels = np.where(lookup_rmv, np.char.add(heights, r'$-$'), heights)
+      colors = np.where(lookup_rmv, self.color_rmv, self.color_neutral)
+      circle_color = self.color_rmv if flip_sign < 0 else self.color_neutral
+      self.marks_potential_rmv.update(labels, colors, flip_sign != 0, x, y, circle_color)
+
+    # Save the figure
+    if self.bbox is None:
+      self.bbox = self.fig.get_tightbbox(self.fig.canvas.get_renderer()).padded(0.1)
+    self.fig.savefig(
+      os.path.join(p.RESULTS_PATH, 'room_iterx_' + str(iterx).zfill(p.ZFILL) + '.png'), bbox_inches=self.bbox, dpi=100)
+
+  # ----------------------------------------------------------------
+  # Release the figure
+  # ----------------------------------------------------------------
+  def close(self):
+    plt.close(self.fig)
+
+
+class RoomMarks:
+
+  # ----------------------------------------------------------------
+  # Create one text per stack of cubes, and the circle that indicates the latest flip
+  # ----------------------------------------------------------------
+  def __init__(self, axx, N):
+    self.texts = [axx.text(idy, idx, '', ha='center', va='center') for idx in range(N) for idy in range(N)]
+    self.labels = np.full((N, N), '', dtype=object)
+    self.colors = np.full((N, N), '', dtype=object)
+    self.circle_flip = plt.Circle((0, 0), 0.5, fill=False, visible=False)
+    axx.add_patch(self.circle_flip)
+
+  # ----------------------------------------------------------------
+  # Only update the texts whose value or color has changed since the previous frame
+  # ----------------------------------------------------------------
+  def update(self, labels, colors, show_circle, x, y, circle_color):
+    for idx in np.flatnonzero((labels != self.labels) | (colors != self.colors)):
+      self.texts[idx].set_text(labels.flat[idx])
+      self.texts[idx].set_color(colors.flat[idx])
+    self.labels = labels.astype(object)
+    self.colors = colors.astype(object)
+    self.circle_flip.set_visible(show_circle)
+    self.circle_flip.center = (x, y)
+    self.circle_flip.set_color(circle_color)
+
+
+# ----------------------------------------------------------------
+# We deserve nice things
+# ----------------------------------------------------------------
+def nice_colorbar(im, axx):
+  divider = make_axes_locatable(axx)
+  cax = divider.append_axes('right', size='5%', pad=0.05)
+  plt.colorbar(im, cax=cax)
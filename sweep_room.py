@@ -0,0 +1,197 @@
+import sys
+import time
+import numpy as np
+import parallel_room
+from display_room import display_room
+from checkpoint import save_checkpoint
+from random_stream import get_random_stream
+from convergence import get_convergence_monitor
+from ensemble_stats import get_ensemble_stats
+from instrumentation import get_probe
+from room_state import RoomState
+from room_state import compute_lookups_rows
+from room_state import get_row_bands
+from utils import print_iter_msg
+
+
+# ----------------------------------------------------------------
+# Iterative sweeps: each sweep proposes one random flip to each of the N^2 stacks, one independent class at a time
+# ----------------------------------------------------------------
+def iterate_sweeps(p, room, f, t_ini, checkpoint=None):
+
+  stream = get_random_stream()
+  monitor = get_convergence_monitor()
+  stats = get_ensemble_stats()
+  probe = get_probe()
+  probe.start()
+
+  # Carve the room until it is half-full, by only removing cubes (unless resuming, as carving precedes any checkpoint)
+  if checkpoint is None:
+    sweepx_start = 0
+    if p.INI_PATTERN == 'random_half':
+      carve_room(room, p.N, get_parity_masks(p.N), p.NB_ITER_INIT)
+      probe.lap('carve')
+  else:
+    sweepx_start = checkpoint['iterx']
+
+  # Optionally, sweep the room with worker processes, each in charge of one tile of the room (which is moved into shared
+  # memory), with independent random streams (restored from the checkpoint when resuming, so that the run matches an
+  # uninterrupted one)
+  if p.ENGINE == 'parallel_sweep':
+    nb_tiles = len(parallel_room.get_tiles(p.N, p.NB_WORKERS))
+    if checkpoint is None:
+      rng_states = [np.random.PCG64(seed).state for seed in stream.spawn_seeds(nb_tiles)]
+    else:
+      rng_states = checkpoint['rng_states']
+      if len(rng_states) != nb_tiles:
+        print('ERROR: The checkpoint was saved with {} tiles, which does not match "NB_WORKERS": {}'.format(
+          len(rng_states), p.NB_WORKERS))
+        sys.exit()
+    sweeper = parallel_room.ParallelSweeper(room, p.N, rng_states)
+    room = sweeper.room
+  else:
+    sweeper = None
+
+  # Sweep the room, and periodically display it (the iteration count is expressed as a number of proposed flips)
+  nb_sweeps_per_print = max(1, p.INTERIM_PRINT_ITERX // p.N**2)
+  nb_sweeps_per_checkpoint = max(1, p.CHECKPOINT_ITERX // p.N**2)
+  nb_sweeps_per_sample = max(1, p.CONVERGENCE_ITERX // p.N**2)
+  nb_sweeps_per_stats = max(1, p.STATS_ITERX // p.N**2)
+  sweepx_end = max(sweepx_start, p.NB_SWEEP_FLIP)
+  for sweepx in range(sweepx_start, p.NB_SWEEP_FLIP):
+
+    # Log the progress
+    t_now = time.time()
+    print_iter_msg('Sweep', sweepx+1, p.NB_SWEEP_FLIP, t_now, t_ini)
+    probe.lap('log')
+
+    if sweeper is not None:
+      sweeper.sweep()
+    else:
+      sweep_rooms([room], p.N, stream)
+    probe.lap('sweep')
+
+    # Track the arctic boundary, as it forms
+    if p.TRACK_BOUNDARY and (sweepx+1) % nb_sweeps_per_print == 0:
+      f.assess_room_boundary(room, p.N)
+      probe.lap('boundary')
+
+    # Intermediate display(s)
+    if p.SHOW_INTERIM and (sweepx+1) % nb_sweeps_per_print == 0:
+      iterx = min(p.NB_ITER_INIT + (sweepx+1) * p.N**2, p.NB_ITER_TOTAL)
+      lookup_add, lookup_rmv = compute_lookups(room, p.N)
+      f.assess_room_fitness(room, p.N)
+      display_room(room, lookup_add, lookup_rmv, t_now, t_ini, p, f, iterx)
+      probe.lap('display')
+
+    # Periodic checkpoint(s)
+    if p.CHECKPOINT_ITERX > 0 and (sweepx+1) % nb_sweeps_per_checkpoint == 0:
+      save_checkpoint(p, get_sweep_state(sweepx+1, room, p.N, monitor, sweeper))
+      probe.lap('checkpoint')
+
+    # Fold the room into the statistics
+    if p.STATS_ITERX > 0 and (sweepx+1) % nb_sweeps_per_stats == 0:
+      stats.add(room)
+      probe.lap('stats')
+
+    # Stop early once the observables have converged
+    if p.CONVERGENCE_ESS > 0 and (sweepx+1) % nb_sweeps_per_sample == 0:
+      f.assess_room_fitness(room, p.N)
+      monitor.sample(f)
+      is_converged = monitor.is_converged(min(p.NB_ITER_INIT + (sweepx+1) * p.N**2, p.NB_ITER_TOTAL))
+      probe.lap('convergence')
+      if is_converged:
+        sweepx_end = sweepx+1
+        break
+
+  # Final checkpoint, from which the run can later be extended with more sweeps
+  if p.CHECKPOINT_ITERX > 0:
+    save_checkpoint(p, get_sweep_state(sweepx_end, room, p.N, monitor, sweeper))
+
+  # Get the room back from the shared memory
+  if sweeper is not None:
+    room = sweeper.close()
+
+  # (the lookup maps are bit-packed, as huge rooms are only ever swept)
+  state = RoomState(room, p.N)
+  return room, state.lookup_add, state.lookup_rmv
+
+
+# ----------------------------------------------------------------
+# Gather the complete state of the sweep chain, after a given number of sweeps
+# ----------------------------------------------------------------
+def get_sweep_state(sweepx, room, N, monitor, sweeper=None):
+  state = RoomState(room, N)
+  return {
+    'iterx': sweepx,
+    'room': room,
+    'lookup_add': state.lookup_add,
+    'lookup_rmv': state.lookup_rmv,
+    'monitor': monitor,
+    'rng_states': None if sweeper is None else sweeper.get_rng_states()}
+
+
+# ----------------------------------------------------------------
+# Split the stacks into two classes, according to the parity of (x + y)
+# ----------------------------------------------------------------
+def get_parity_masks(N):
+  return get_parity_masks_rows(N, 0, N)
+
+
+# ----------------------------------------------------------------
+# Split the stacks of the rows [y_ini, y_end) into two classes, according to the parity of (x + y)
+# ----------------------------------------------------------------
+def get_parity_masks_rows(N, y_ini, y_end):
+  is_even = (np.arange(y_ini, y_end)[:, None] + np.arange(N)[None, :]) % 2 == 0
+  return is_even, ~is_even
+
+
+# ----------------------------------------------------------------
+# Compute the Boolean lookup maps that indicate where cubes could be added and removed
+# ----------------------------------------------------------------
+def compute_lookups(room, N):
+  return compute_lookups_rows(room, N, 0, N)
+
+
+# ----------------------------------------------------------------
+# Flip the stacks of one class within the rows [y_ini, y_end) at once: a uniform draw below 0.5 proposes to add a cube,
+# otherwise to remove one
+# ----------------------------------------------------------------
+def sweep_class_rows(room, N, y_ini, y_end, mask, uniforms):
+  lookup_add, lookup_rmv = compute_lookups_rows(room, N, y_ini, y_end)
+  is_add = uniforms < 0.5
+  lookup_add &= mask & is_add
+  lookup_rmv &= mask & ~is_add
+  rows = room[y_ini:y_end]
+  rows += lookup_add
+  rows -= lookup_rmv
+
+
+# ----------------------------------------------------------------
+# Apply one sweep (both classes in turn) to each room, with the same uniform random maps for all rooms
+# ----------------------------------------------------------------
+def sweep_rooms(rooms, N, rng):
+  # The class of a stack only depends on its neighbors, which all belong to the other class: the room can therefore be
+  # swept one band of rows at a time, which bounds the size of the temporary arrays (including the random maps)
+  for class_idx in range(2):
+    for y_ini, y_end in get_row_bands(N):
+      mask = get_parity_masks_rows(N, y_ini, y_end)[class_idx]
+      uniforms = rng.random((y_end - y_ini, N))
+      for room in rooms:
+        sweep_class_rows(room, N, y_ini, y_end, mask, uniforms)
+
+
+# ----------------------------------------------------------------
+# Remove a given number of cubes from the room, by randomly peeling the removable cubes of one class at a time
+# ----------------------------------------------------------------
+def carve_room(room, N, masks, nb_cubes):
+  stream = get_random_stream()
+  class_idx = 0
+  while nb_cubes > 0:
+    _, lookup_rmv = compute_lookups(room, N)
+    candidates = np.flatnonzero(masks[class_idx] & lookup_rmv & (stream.random((N, N)) < 0.5))
+    if candidates.size > nb_cubes:
+      candidates = stream.choice(candidates, nb_cubes)
+    room.ravel()[candidates] -= 1
+    nb_cubes -= candidates.size
+    class_idx = 1 - class_idx
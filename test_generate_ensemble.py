@@ -0,0 +1,47 @@
+import os
+import pytest
+import main
+import parameters
+from room_store import load_room_store
+from generate_ensemble import generate_ensemble
+
+
+# ----------------------------------------------------------------
+# Set the parameters of a small, headless ensemble, saved in a temporary folder
+# ----------------------------------------------------------------
+def get_ensemble_parameters(results_path, **kwargs):
+  return parameters.Parameters(**dict(
+    main.DEFAULT_PARAMETERS,
+    N=4,
+    GENERATE_HEX=False,
+    INI_PATTERN='empty',
+    NB_ITER_FLIP=200,
+    NB_SAMPLES=4,
+    NB_WORKERS=2,
+    SHOW_INTERIM=False,
+    SHOW_FINAL_ROOM=False,
+    USE_RANDOM_SEED=True,
+    RESULTS_PATH=str(results_path),
+    **kwargs))
+
+
+# ----------------------------------------------------------------
+# With checkpoints enabled, the workers must not race on a shared checkpoint file
+# ----------------------------------------------------------------
+def test_ensemble_with_checkpoints(tmp_path):
+  p = get_ensemble_parameters(tmp_path, CHECKPOINT_ITERX=10)
+  generate_ensemble(p)
+  info, rooms = load_room_store(os.path.join(p.RESULTS_PATH, p.ENSEMBLE_NAME))
+  assert info['nb_rooms'] == p.NB_SAMPLES
+  assert any((rooms[0] != room).any() for room in rooms[1:])
+  assert not os.path.exists(os.path.join(p.RESULTS_PATH, p.CHECKPOINT_NAME))
+
+
+# ----------------------------------------------------------------
+# Recording a trajectory is refused for an ensemble, as all the samples would write to the same file
+# ----------------------------------------------------------------
+def test_ensemble_with_trajectory(tmp_path):
+  p = get_ensemble_parameters(tmp_path, RECORD_TRAJECTORY=True)
+  with pytest.raises(SystemExit):
+    generate_ensemble(p)
+  assert not os.path.exists(os.path.join(p.RESULTS_PATH, p.TRAJECTORY_NAME))
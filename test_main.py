@@ -0,0 +1,35 @@
+import os
+import main
+from room_store import load_room_store
+
+
+# ----------------------------------------------------------------
+# Run one subcommand of the command line
+# ----------------------------------------------------------------
+def run_command(argv):
+  args = main.get_parser().parse_args(argv)
+  args.func(args)
+
+
+# ----------------------------------------------------------------
+# The hex is rendered with the parameters of the saved room, whatever the defaults of the command line
+# ----------------------------------------------------------------
+def test_render_saved_room(tmp_path):
+  results_path = str(tmp_path)
+  run_command(['generate', '-N', '8', '--ini-pattern', 'empty', '--nb-flips', '200', '--seed', '3', '--results', results_path])
+  for renderer in ['raster', 'svg']:
+    run_command(['render', '--renderer', renderer, '--results', results_path])
+  filename = 'Hex.Size=8.Init=empty.NbFlips=200.FloorsAndWall=True.Color=rgb'
+  assert os.path.isfile(os.path.join(results_path, filename + '.png'))
+  assert os.path.isfile(os.path.join(results_path, filename + '.svg'))
+
+
+# ----------------------------------------------------------------
+# The seed of the command line is recorded along with the room without loss (an integer stays an integer)
+# ----------------------------------------------------------------
+def test_generate_records_seed(tmp_path):
+  results_path = str(tmp_path)
+  for seed in [3, 2**60 + 1, 3.14]:
+    run_command(['generate', '-N', '4', '--nb-flips', '10', '--seed', str(seed), '--results', results_path])
+    info, _ = load_room_store(os.path.join(results_path, 'room.bin'))
+    assert info['seed'] == seed and type(info['seed']) is type(seed)
@@ -0,0 +1,40 @@
+import time
+import numpy as np
+import main
+import parameters
+from generate_room import run_room_chain
+
+
+# ----------------------------------------------------------------
+# Set the parameters of a small, headless parallel sweep, saved in a temporary folder
+# ----------------------------------------------------------------
+def get_sweep_parameters(results_path, **kwargs):
+  return parameters.Parameters(**dict(
+    main.DEFAULT_PARAMETERS,
+    N=8,
+    GENERATE_HEX=False,
+    INI_PATTERN='random_half',
+    ENGINE='parallel_sweep',
+    NB_WORKERS=2,
+    SHOW_INTERIM=False,
+    SHOW_FINAL_ROOM=False,
+    USE_RANDOM_SEED=True,
+    VAL_RANDOM_SEED=3,
+    CHECKPOINT_ITERX=8**2,
+    RESULTS_PATH=str(results_path),
+    **kwargs))
+
+
+# ----------------------------------------------------------------
+# A parallel sweep that is extended from its checkpoint matches an uninterrupted one
+# ----------------------------------------------------------------
+def test_parallel_sweep_resume(tmp_path):
+  p = get_sweep_parameters(tmp_path / 'uninterrupted', NB_ITER_FLIP=6 * 8**2)
+  room_uninterrupted, _, _, _ = run_room_chain(p, time.time())
+
+  p = get_sweep_parameters(tmp_path / 'resumed', NB_ITER_FLIP=3 * 8**2)
+  run_room_chain(p, time.time())
+  p = get_sweep_parameters(tmp_path / 'resumed', NB_ITER_FLIP=6 * 8**2, RESUME=True)
+  room_resumed, _, _, _ = run_room_chain(p, time.time())
+
+  assert np.array_equal(room_uninterrupted, room_resumed)
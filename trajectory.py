@@ -0,0 +1,177 @@
+import os
+import sys
+import numpy as np
+import fitness
+from display_room import display_room
+from room_store import get_height_dtype
+from sweep_room import compute_lookups
+
+
+# Fixed-size header, followed by one packed record per flip, and then by the keyframes of the room
+MAGIC = b'ARCTICTR'
+VERSION = 1
+HEADER_SIZE = 128
+HEADER_DTYPE = np.dtype([
+  ('magic', 'S8'),
+  ('version', '<u4'),
+  ('N', '<u4'),
+  ('iterx_start', '<u8'),
+  ('nb_iter', '<u8'),
+  ('keyframe_iterx', '<u8'),
+  ('nb_keyframes', '<u8'),
+  ('height_dtype', 'S8'),
+  ('record_dtype', 'S8'),
+  ('padding', 'V{}'.format(HEADER_SIZE - 64))])
+
+
+class TrajectoryRecorder:
+
+  # ----------------------------------------------------------------
+  # Create the trajectory file, with the initial room as first keyframe
+  # ----------------------------------------------------------------
+  def __init__(self, path, room, N, iterx_start, nb_iter, keyframe_iterx):
+
+    self.path = path
+    self.N = N
+    self.iterx_start = iterx_start
+    self.keyframe_iterx = keyframe_iterx
+    nb_keyframes = nb_iter // keyframe_iterx + 1
+    height_dtype = get_height_dtype(N)
+    record_dtype = get_record_dtype(N)
+
+    # Write the header
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['N'] = N
+    header['iterx_start'] = iterx_start
+    header['nb_iter'] = nb_iter
+    header['keyframe_iterx'] = keyframe_iterx
+    header['nb_keyframes'] = nb_keyframes
+    header['height_dtype'] = height_dtype.str.encode()
+    header['record_dtype'] = record_dtype.str.encode()
+    with open(path, 'wb') as fid:
+      header.tofile(fid)
+
+    # Map the records and the keyframes, which are filled as the chain goes
+    self.records, self.keyframes = map_trajectory(path, 'r+', N, nb_iter, nb_keyframes, height_dtype, record_dtype)
+    self.keyframes[0] = room
+
+  # ----------------------------------------------------------------
+  # Record one flip, and the room itself if a keyframe is due
+  # ----------------------------------------------------------------
+  def record(self, iterx, x, y, flip_sign, room):
+    idx = iterx - self.iterx_start
+    self.records[idx] = ((y * self.N + x) << 1) | (flip_sign > 0)
+    if (idx + 1) % self.keyframe_iterx == 0:
+      self.keyframes[(idx + 1) // self.keyframe_iterx] = room
+
+  # ----------------------------------------------------------------
+  # Write the trajectory to the disk
+  # ----------------------------------------------------------------
+  def close(self, nb_iter_done=None):
+    self.records.flush()
+    self.keyframes.flush()
+
+    # If the chain was stopped early, only keep the flips that were applied (and the keyframes among them)
+    if nb_iter_done is not None and nb_iter_done < self.records.size:
+      del self.records, self.keyframes
+      truncate_trajectory(self.path, nb_iter_done)
+
+
+# ----------------------------------------------------------------
+# Get the smallest unsigned integer type that can store a packed flip record: ((y * N + x) << 1) | (flip_sign > 0)
+# ----------------------------------------------------------------
+def get_record_dtype(N):
+  if 2 * N**2 <= np.iinfo(np.uint16).max + 1:
+    return np.dtype('<u2')
+  else:
+    return np.dtype('<u4')
+
+
+# ----------------------------------------------------------------
+# Map the records and the keyframes of a trajectory file
+# ----------------------------------------------------------------
+def map_trajectory(path, mode, N, nb_iter, nb_keyframes, height_dtype, record_dtype):
+  records = np.memmap(path, dtype=record_dtype, mode=mode, offset=HEADER_SIZE, shape=(nb_iter,))
+  keyframes = np.memmap(
+    path, dtype=height_dtype, mode=mode, offset=HEADER_SIZE + nb_iter * record_dtype.itemsize, shape=(nb_keyframes, N, N))
+  return records, keyframes
+
+
+# ----------------------------------------------------------------
+# Shorten a trajectory file to its first flips (a temporary file is written first, and then replaces the trajectory)
+# ----------------------------------------------------------------
+def truncate_trajectory(path, nb_iter):
+
+  header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+  _, records, keyframes = load_trajectory(path)
+  nb_keyframes = nb_iter // int(header['keyframe_iterx'][0]) + 1
+  header['nb_iter'] = nb_iter
+  header['nb_keyframes'] = nb_keyframes
+
+  with open(path + '.tmp', 'wb') as fid:
+    header.tofile(fid)
+    np.asarray(records[:nb_iter]).tofile(fid)
+    np.asarray(keyframes[:nb_keyframes]).tofile(fid)
+  del records, keyframes
+  os.replace(path + '.tmp', path)
+
+
+# ----------------------------------------------------------------
+# Load a trajectory lazily: the header as a dictionary, and the read-only memory-mapped records and keyframes
+# ----------------------------------------------------------------
+def load_trajectory(path):
+
+  header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+  if header['magic'] != MAGIC or header['version'] != VERSION:
+    print('ERROR: Not a trajectory (or unsupported version): ' + str(path))
+    sys.exit()
+
+  info = {
+    'N': int(header['N']),
+    'iterx_start': int(header['iterx_start']),
+    'nb_iter': int(header['nb_iter']),
+    'keyframe_iterx': int(header['keyframe_iterx'])}
+  records, keyframes = map_trajectory(
+    path, 'r', info['N'], info['nb_iter'], int(header['nb_keyframes']),
+    np.dtype(header['height_dtype'].decode()), np.dtype(header['record_dtype'].decode()))
+  return info, records, keyframes
+
+
+# ----------------------------------------------------------------
+# Rebuild the room at a given iteration, from the nearest preceding keyframe, and get the latest flip [x, y, flip_sign]
+# ----------------------------------------------------------------
+def replay_room(trajectory, iterx):
+
+  info, records, keyframes = trajectory
+  idx = iterx - info['iterx_start']
+  if idx < 0 or idx > info['nb_iter']:
+    print('ERROR: Iteration {} is not within the trajectory [{}, {}]'.format(
+      iterx, info['iterx_start'], info['iterx_start'] + info['nb_iter']))
+    sys.exit()
+
+  # Start from the keyframe, and apply the subsequent flips all at once (the order of the flips does not matter)
+  keyframe_idx = idx // info['keyframe_iterx']
+  room = keyframes[keyframe_idx].astype(np.int32)
+  codes = np.asarray(records[keyframe_idx * info['keyframe_iterx']:idx]).astype(np.int64)
+  np.add.at(room.ravel(), codes >> 1, 2 * (codes & 1) - 1)
+
+  # Latest flip, to be indicated on the displayed room (on purpose, if "flip_sign == 0", no circle shall be drawn)
+  if idx == 0:
+    return room, 0, 0, 0
+  code = int(records[idx - 1])
+  position = code >> 1
+  return room, position % info['N'], position // info['N'], 2 * (code & 1) - 1
+
+
+# ----------------------------------------------------------------
+# Display the room at given iterations of a recorded trajectory, as if the images had been printed during the run
+# ----------------------------------------------------------------
+def display_trajectory(p, trajectory, iterx_list, t_ini):
+  f = fitness.Fitness()
+  for iterx in iterx_list:
+    room, x, y, flip_sign = replay_room(trajectory, iterx)
+    lookup_add, lookup_rmv = compute_lookups(room, p.N)
+    f.assess_room_fitness(room, p.N)
+    display_room(room, lookup_add, lookup_rmv, t_ini, t_ini, p, f, iterx, x, y, flip_sign)
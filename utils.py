@@ -1,4 +1,7 @@
+import sys
+import json
 import math
+from instrumentation import get_probe
 
 
 # ----------------------------------------------------------------
@@ -16,7 +19,12 @@ def stopwatch(time_now, time_ini):
 # ----------------------------------------------------------------
 # Print the progression in the console
 # ----------------------------------------------------------------
-def print_iter_msg(msg, iterx, nb_iter, time_now, time_ini):
+def print_iter_msg(msg, iterx, nb_iter, time_now, time_ini, f=None):
+
+  # When the console is not interactive (e.g., redirected into a log file), print structured records instead
+  if not sys.stdout.isatty():
+    print_iter_record(msg, iterx, nb_iter, time_now, time_ini, f)
+    return
 
   if iterx > 0:
     replace_previous_line = '\033[F\033[K' # (go up one line and clear until the end of the line)
@@ -25,11 +33,68 @@ def print_iter_msg(msg, iterx, nb_iter, time_now, time_ini):
 
   percentage = 100 * (iterx) / max(nb_iter, 1) # (enable cases with zero iterations)
 
+  # Optionally, append the current fitness metrics (and the arctic boundary, if tracked)
+  if f is not None:
+    fitness_msg = ' | Monotony: {}, Filling: {}, Poles: ({}, {}), ({}, {}), ({}, {})'.format(
+      f.monotony, f.filling, f.x_full, f.x_empty, f.y_full, f.y_empty, f.z_full, f.z_empty)
+    if f.boundary is not None:
+      fitness_msg += ', ' + get_boundary_msg(f.boundary)
+  else:
+    fitness_msg = ''
+
   elapsed_time = stopwatch(time_now, time_ini)
-  print('{}{}\t| {}/{} ({}%) {}'.format(
+  print('{}{}\t| {}/{} ({}%) {}{}'.format(
     replace_previous_line,
     msg,
     iterx,
     nb_iter,
     percentage,
-    elapsed_time))
+    elapsed_time,
+    fitness_msg))
+
+
+# ----------------------------------------------------------------
+# Express the arctic boundary as a string detailing the centre, radii, angle, and residual of the fitted ellipse
+# ----------------------------------------------------------------
+def get_boundary_msg(boundary):
+  if boundary['centre'] is None:
+    return 'Circle: None ({} points)'.format(boundary['nb_points'])
+  return 'Circle: ({:.4f}, {:.4f}), ({:.4f}, {:.4f}), {:.1f} deg, residual {:.4f} ({} points)'.format(
+    *boundary['centre'], *boundary['radii'], boundary['angle'], boundary['residual'], boundary['nb_points'])
+
+
+# Latest record of each progression message, to measure the number of iterations per second between two records
+previous_records = {}
+
+
+# ----------------------------------------------------------------
+# Print the progression in the console as a JSON line, along with the time spent in each phase (if instrumented)
+# ----------------------------------------------------------------
+def print_iter_record(msg, iterx, nb_iter, time_now, time_ini, f=None):
+
+  record = {
+    'msg': msg,
+    'iterx': int(iterx),
+    'nb_iter': int(nb_iter),
+    'elapsed_seconds': round(time_now - time_ini, 6)}
+
+  # Iterations per second since the previous record of the same progression
+  iterx_previous, time_previous = previous_records.get(msg, (iterx, time_now))
+  if iterx >= iterx_previous and time_now > time_previous:
+    record['iter_per_second'] = round((iterx - iterx_previous) / (time_now - time_previous), 3)
+  previous_records[msg] = (iterx, time_now)
+
+  # Optionally, append the current fitness metrics
+  if f is not None:
+    record['fitness'] = {
+      'monotony': bool(f.monotony),
+      'filling': float(f.filling),
+      'poles': [int(f.x_full), int(f.x_empty), int(f.y_full), int(f.y_empty), int(f.z_full), int(f.z_empty)]}
+    if f.boundary is not None:
+      record['boundary'] = f.boundary
+
+  phases = get_probe().get_phases()
+  if phases is not None:
+    record['phases'] = phases
+
+  print(json.dumps(record), flush=True)